@@ -0,0 +1,193 @@
+import json
+import numpy as np
+import os
+import sys
+import time
+
+import colordiff
+import newton
+import texture
+import texturesimple
+import textureX
+import textureY
+from compositing import FrontToBack
+from dataset import Dataset
+from model.basemodel import Sample
+from model.splinemodel import SplineModel
+from ray import Ray2D
+from samplingtype import SamplingType
+from splineplane import SplinePlane
+
+
+class KernelBenchmark:
+    def __init__(self):
+        self.splineInterval = [0.0, 1.0]
+        self.eye = np.array([-1.2, 0.65])
+        self.pixel = np.array([-0.5, 0.55])
+        self.pixelWidth = 0.7 / 100
+        self.delta = 1e-2
+        self.tolerance = 1e-5
+
+        self.texDimSize = 32
+        self.fetchCount = 100
+
+        self.warmup = 0.2
+        self.repeats = 30
+        self.minRepeatTime = 0.01
+        self.percentiles = [50, 90, 99]
+
+        self.outputDir = 'output/bench'
+
+    def measure(self, kernel, operations):
+        '''
+        Times kernel, which performs the given number of operations per call, and
+        returns statistics in seconds per operation
+        '''
+        start = time.time()
+
+        while time.time() - start < self.warmup:
+            kernel()
+
+        # Calls per repeat are chosen so that each repeat is long enough to time reliably
+        number = 1
+
+        while True:
+            start = time.time()
+            for i in xrange(number):
+                kernel()
+            elapsed = time.time() - start
+
+            if elapsed >= self.minRepeatTime:
+                break
+
+            number *= 2
+
+        times = np.empty(self.repeats)
+
+        for i in range(self.repeats):
+            start = time.time()
+            for j in xrange(number):
+                kernel()
+            times[i] = (time.time() - start) / (number * operations)
+
+        result = {
+            'min' : times.min(),
+            'mean' : times.mean(),
+            'std' : times.std(),
+            'calls' : number * self.repeats,
+            'operations' : operations
+        }
+
+        for p in self.percentiles:
+            result['p{}'.format(p)] = np.percentile(times, p)
+
+        return result
+
+    def kernels(self, dataset):
+        '''Returns a list of (name, kernel, operations per call)'''
+        rho = dataset.rho
+        phi = dataset.phi
+        tf = dataset.tf
+        interval = self.splineInterval
+
+        phiPlane = SplinePlane(phi, interval, self.tolerance)
+        boundingBox = phiPlane.createBoundingBox()
+        refSplineModel = SplineModel(tf, phiPlane, rho, self.tolerance)
+
+        viewRay = Ray2D(self.eye, self.pixel, 10, self.pixelWidth)
+
+        uvGuess = np.array([0.4, 0.6])
+        geomPoint = phiPlane.evaluate(0.5, 0.5)
+        frustum = viewRay.frustumBoundingEllipseParams(geomPoint, self.delta)
+
+        def phiDiff(u, v):
+            return phi.evaluate(u, v) - geomPoint
+
+        size = self.texDimSize
+        scalars = refSplineModel.generateScalarMatrix(boundingBox, size, size, self.tolerance)
+        texelsY, indicatorsY = textureY.create(refSplineModel, size, size, self.tolerance)
+
+        textures = [
+            ('texture', texture.Texture2D(scalars)),
+            ('texturesimple', texturesimple.Texture2D(scalars)),
+            ('textureX', textureX.Texture2D(scalars)),
+            ('textureY', textureY.Texture2D(texelsY, indicatorsY))
+        ]
+
+        uvs = np.random.RandomState(0).rand(self.fetchCount, 2)
+
+        samples = [Sample(geomPoint, scalar, SamplingType.SPLINE_MODEL) for scalar in np.linspace(0.0, 1.0, 10)]
+
+        rgbas = np.random.RandomState(1).rand(100, 4)
+        refRgbas = np.random.RandomState(2).rand(400, 4)
+
+        result = [
+            ('Spline2D.evaluate', lambda: phi.evaluate(0.5, 0.5), 1),
+            ('Spline2D.jacob', lambda: phi.jacob(0.5, 0.5), 1),
+            ('newtonsMethod1D', lambda: newton.newtonsMethod1D(lambda x: x**3 - 2.0, lambda x: 3.0*x**2, 1.0, self.tolerance), 1),
+            ('newtonsMethod2DTolerance', lambda: newton.newtonsMethod2DTolerance(phi, uvGuess, geomPoint, [interval, interval], self.tolerance), 1),
+            ('newtonsMethod2DIntersect', lambda: newton.newtonsMethod2DIntersect(phiPlane.left, phiPlane.dleft, viewRay, 0.5, interval, self.tolerance), 1),
+            ('newtonsMethod2DFrustum', lambda: newton.newtonsMethod2DFrustum(phiDiff, phi.jacob, uvGuess, interval, phi, frustum), 1),
+            ('SplinePlane.findTwoIntersections', lambda: phiPlane.findTwoIntersections(viewRay), 1)
+        ]
+
+        for name, tex in textures:
+            def fetchAll(tex=tex):
+                for uv in uvs:
+                    tex.fetch(uv)
+
+            result.append(('{}.fetch'.format(name), fetchAll, len(uvs)))
+
+        def composite():
+            compositing = FrontToBack(tf)
+            for sample in samples:
+                compositing.addSample(sample, self.delta)
+
+        result += [
+            ('FrontToBack.addSample', composite, len(samples)),
+            ('colordiff.compare', lambda: colordiff.compare(refRgbas, rgbas), 1),
+            ('generateScalarMatrix', lambda: refSplineModel.generateScalarMatrix(boundingBox, 8, 8, self.tolerance), 1)
+        ]
+
+        return result
+
+    def run(self, rhoNo=1, phiNo=1, tfNo=1, name='latest', pattern=''):
+        dataset = Dataset(rhoNo, phiNo, tfNo)
+        results = {}
+
+        print "{:<34} {:>12} {:>12} {:>12} {:>12}".format('kernel (us/op)', 'min', 'p50', 'p90', 'p99')
+
+        for kernelName, kernel, operations in self.kernels(dataset):
+            if pattern not in kernelName:
+                continue
+
+            stats = self.measure(kernel, operations)
+            results[kernelName] = stats
+
+            print "{:<34} {:>12.2f} {:>12.2f} {:>12.2f} {:>12.2f}".format(
+                kernelName, stats['min']*1e6, stats['p50']*1e6, stats['p90']*1e6, stats['p99']*1e6)
+
+        if not os.path.exists(self.outputDir):
+            os.makedirs(self.outputDir)
+
+        path = '{}/kernels_{},{},{}_{}.json'.format(self.outputDir, rhoNo, phiNo, tfNo, name)
+
+        with open(path, 'w') as f:
+            json.dump({
+                'dataset' : [rhoNo, phiNo, tfNo],
+                'date' : time.strftime('%Y-%m-%d %H:%M:%S'),
+                'repeats' : self.repeats,
+                'kernels' : results
+            }, f, indent=1, sort_keys=True)
+
+        print "Wrote {}".format(path)
+
+
+if __name__ == '__main__':
+    rhoNo = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    phiNo = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    tfNo = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    name = sys.argv[4] if len(sys.argv) > 4 else 'latest'
+    pattern = sys.argv[5] if len(sys.argv) > 5 else ''
+
+    KernelBenchmark().run(rhoNo, phiNo, tfNo, name, pattern)
@@ -0,0 +1,278 @@
+import json
+import numpy as np
+import os
+import sys
+import time
+
+import fileio.voxelio as voxelio
+from dataset import Dataset
+from model.boundaryaccuratemodel import BoundaryAccurateModel
+from model.hybridmodel import HybridModel
+from model.splinemodel import SplineModel
+from model.thickboundaryaccuratemodel import ThickBoundaryAccurateModel
+from model.voxellodmodel import VoxelLodModel
+from model.voxelmodel import VoxelModel
+from hybridrenderer import HybridRenderer
+from pagedtexture import PagedTexture2D
+from renderer import Renderer
+from screen import Screen
+from splineplane import SplinePlane
+from texture import Texture2D
+from voxelcriterion.geometriccriterion import GeometricCriterion
+
+
+def printflush(string):
+    sys.stdout.write(string)
+    sys.stdout.flush()
+
+
+class RenderBenchmark:
+    def __init__(self):
+        self.splineInterval = [0.0, 1.0]
+
+        self.screenBottom = np.array([-0.5, 0.2])
+        self.screenTop = np.array([-0.5, 0.9])
+        self.eye = np.array([-1.2, 0.65])
+
+        self.refTolerance = 1e-5
+        self.voxelizationTolerance = 1e-5
+
+        self.pixelCounts = [50, 100]
+        self.deltas = [1e-2, 5e-3]
+        self.texDimSizes = [16, 64, 256]
+        self.inverseGridSize = 32
+
+        # Macro-cell size of the voxelempty runs, skipping empty and transparent cells, or None for none
+        self.emptySpaceCellSize = 4
+
+        # PagedTexture2D runs, with tiles voxelized as the rays reach them and read back from disk
+        self.pagedTexDimSize = 64
+        self.pagedTileSize = 16
+        self.pagedMaxTiles = 8
+        self.repeats = 3
+
+        self.outputDir = 'output/bench'
+
+    def filepath(self, dataset, name):
+        return '{}/{},{},{}_{}.json'.format(self.outputDir, dataset.rhoNumber, dataset.phiNumber, dataset.tfNumber, name)
+
+    def readTexture(self, dataset, refSplineModel, boundingBox, texDimSize):
+        if voxelio.exist(dataset, texDimSize, texDimSize):
+            samplingScalars = voxelio.read(dataset, texDimSize, texDimSize)
+        else:
+            samplingScalars = refSplineModel.generateScalarMatrix(boundingBox, texDimSize, texDimSize,
+                                                                  self.voxelizationTolerance)
+            voxelio.write(dataset, samplingScalars)
+
+        return Texture2D(samplingScalars)
+
+    def measure(self, renderer, model, delta):
+        '''Renders repeats times and returns the fastest run with its counts.'''
+        bestTime = float('inf')
+
+        for i in range(self.repeats):
+            start = time.time()
+            renderResult = renderer.render(model, delta)
+            seconds = time.time() - start
+
+            if seconds < bestTime:
+                bestTime = seconds
+                bestResult = renderResult
+
+        return bestTime, bestResult.totalSamplePoints, bestResult.counters.newtonIterations
+
+    def measurePaged(self, renderer, createModel, delta):
+        '''
+        Renders repeats times, each with a fresh model from createModel whose
+        PagedTexture2D has no tiles in memory yet. Returns the fastest run with
+        its counts and its texture's tile counts
+        '''
+        bestTime = float('inf')
+
+        for i in range(self.repeats):
+            model = createModel()
+
+            start = time.time()
+            renderResult = renderer.render(model, delta)
+            seconds = time.time() - start
+
+            if seconds < bestTime:
+                bestTime = seconds
+                bestResult = renderResult
+                texture = model.scalarTexture
+
+        tileCounts = {
+            'tilesVoxelized' : texture.tilesVoxelized,
+            'tilesRead' : texture.tilesRead,
+            'tilesEvicted' : texture.tilesEvicted
+        }
+
+        return bestTime, bestResult.totalSamplePoints, bestResult.counters.newtonIterations, tileCounts
+
+    def run(self, rhoNo=1, phiNo=1, tfNo=1, name='latest'):
+        dataset = Dataset(rhoNo, phiNo, tfNo)
+
+        rho = dataset.rho
+        phi = dataset.phi
+        tf = dataset.tf
+        phiPlane = SplinePlane(phi, self.splineInterval, 1e-5)
+
+        boundingBox = phiPlane.createBoundingBox()
+
+        refSplineModel = SplineModel(tf, phiPlane, rho, self.refTolerance)
+        directSplineModel = SplineModel(tf, phiPlane, rho)
+
+        refGridModel = SplineModel(tf, phiPlane, rho, self.refTolerance)
+        refGridModel.createInverseGrid(self.inverseGridSize, self.inverseGridSize, self.voxelizationTolerance)
+        directGridModel = SplineModel(tf, phiPlane, rho)
+        directGridModel.inverseGrid = refGridModel.inverseGrid
+
+        textures = {}
+        size = max(self.texDimSizes)
+        while size >= 2:
+            textures[size] = self.readTexture(dataset, refSplineModel, boundingBox, size)
+            size /= 2
+
+        def createPagedModel(tileDataset):
+            size = self.pagedTexDimSize
+            texture = PagedTexture2D(refSplineModel, boundingBox, size, size, self.voxelizationTolerance,
+                                     self.pagedTileSize, self.pagedMaxTiles, tileDataset)
+
+            return VoxelModel(tf, texture, boundingBox)
+
+        runs = []
+
+        def addRun(modelName, delta, numPixels, texSize, seconds, samples, iterations):
+            run = {
+                'model' : modelName,
+                'pixels' : numPixels,
+                'delta' : delta,
+                'texSize' : texSize,
+                'seconds' : seconds,
+                'rays' : numPixels,
+                'samples' : samples,
+                'newtonIterations' : iterations,
+                'raysPerSecond' : numPixels / seconds,
+                'samplesPerSecond' : samples / seconds,
+                'newtonIterationsPerSecond' : iterations / seconds
+            }
+
+            runs.append(run)
+
+            return run
+
+        def bench(modelName, renderer, model, delta, numPixels, texSize=0):
+            printflush("{} ({}px, delta {}, tex {})... ".format(modelName, numPixels, delta, texSize))
+            seconds, samples, iterations = self.measure(renderer, model, delta)
+            print "{:.3f}s".format(seconds)
+
+            addRun(modelName, delta, numPixels, texSize, seconds, samples, iterations)
+
+        def benchPaged(modelName, renderer, tileDataset, delta, numPixels):
+            texSize = self.pagedTexDimSize
+            printflush("{} ({}px, delta {}, tex {})... ".format(modelName, numPixels, delta, texSize))
+            seconds, samples, iterations, tileCounts = self.measurePaged(
+                renderer, lambda: createPagedModel(tileDataset), delta)
+            print "{:.3f}s ({tilesVoxelized} voxelized, {tilesRead} read, {tilesEvicted} evicted)".format(
+                seconds, **tileCounts)
+
+            addRun(modelName, delta, numPixels, texSize, seconds, samples, iterations).update(tileCounts)
+
+        for numPixels in self.pixelCounts:
+            screen = Screen(self.screenBottom, self.screenTop, numPixels)
+            renderer = Renderer(self.eye, screen)
+            hybridRenderer = HybridRenderer(self.eye, screen)
+
+            for delta in self.deltas:
+                bench('reference', renderer, refSplineModel, delta, numPixels)
+                bench('direct', renderer, directSplineModel, delta, numPixels)
+                bench('refgrid', renderer, refGridModel, delta, numPixels)
+                bench('directgrid', renderer, directGridModel, delta, numPixels)
+
+                if self.pagedTexDimSize is not None:
+                    benchPaged('pagedvoxelized', renderer, None, delta, numPixels)
+
+                    # Writes the tiles the rays reach to disk, for pagedread to read back
+                    renderer.render(createPagedModel(dataset), delta)
+                    benchPaged('pagedread', renderer, dataset, delta, numPixels)
+
+                for texSize in self.texDimSizes:
+                    scalarTexture = textures[texSize]
+
+                    voxelWidth = boundingBox.getWidth() / float(texSize)
+                    voxelHeight = boundingBox.getHeight() / float(texSize)
+                    criterion = GeometricCriterion(screen.pixelWidth, voxelWidth, voxelHeight)
+
+                    lodTextures = [textures[size] for size in sorted(textures, reverse=True) if size <= texSize]
+
+                    voxelModel = VoxelModel(tf, scalarTexture, boundingBox)
+                    baModel = BoundaryAccurateModel(tf, directSplineModel, voxelModel)
+                    tbaModel = ThickBoundaryAccurateModel(tf, directSplineModel, voxelModel)
+                    lodModel = VoxelLodModel(tf, lodTextures, boundingBox, screen.pixelWidth)
+                    hybridModel = HybridModel(tf, directSplineModel, voxelModel, criterion)
+                    baHybridModel = HybridModel(tf, directSplineModel, baModel, criterion)
+
+                    bench('voxel', renderer, voxelModel, delta, numPixels, texSize)
+
+                    if self.emptySpaceCellSize is not None:
+                        emptySpaceModel = VoxelModel(tf, scalarTexture, boundingBox)
+                        emptySpaceModel.createEmptySpaceGrid(self.emptySpaceCellSize)
+                        bench('voxelempty', renderer, emptySpaceModel, delta, numPixels, texSize)
+
+                    bench('ba', renderer, baModel, delta, numPixels, texSize)
+                    bench('tba', renderer, tbaModel, delta, numPixels, texSize)
+                    bench('lod', renderer, lodModel, delta, numPixels, texSize)
+                    bench('hybrid', hybridRenderer, hybridModel, delta, numPixels, texSize)
+                    bench('bahybrid', hybridRenderer, baHybridModel, delta, numPixels, texSize)
+
+        if not os.path.exists(self.outputDir):
+            os.makedirs(self.outputDir)
+
+        path = self.filepath(dataset, name)
+
+        with open(path, 'w') as f:
+            json.dump({
+                'dataset' : [rhoNo, phiNo, tfNo],
+                'date' : time.strftime('%Y-%m-%d %H:%M:%S'),
+                'repeats' : self.repeats,
+                'runs' : runs
+            }, f, indent=1, sort_keys=True)
+
+        print "Wrote {}".format(path)
+
+
+def runKey(run):
+    return (run['model'], run['pixels'], run['delta'], run['texSize'])
+
+
+def compare(oldPath, newPath, threshold=0.1):
+    '''Prints the speedup of every run in newPath relative to the matching run in oldPath.'''
+    with open(oldPath) as f:
+        oldRuns = dict((runKey(run), run) for run in json.load(f)['runs'])
+
+    with open(newPath) as f:
+        newRuns = json.load(f)['runs']
+
+    for run in newRuns:
+        key = runKey(run)
+
+        if key not in oldRuns:
+            continue
+
+        speedup = oldRuns[key]['seconds'] / run['seconds']
+        flag = ' REGRESSION' if speedup < 1.0 - threshold else ''
+
+        print "{:<14} {:>4}px delta {:<7} tex {:>4}: {:.3f}s -> {:.3f}s ({:.2f}x){}".format(
+            key[0], key[1], key[2], key[3], oldRuns[key]['seconds'], run['seconds'], speedup, flag)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'compare':
+        compare(sys.argv[2], sys.argv[3])
+    else:
+        rhoNo = int(sys.argv[1])
+        phiNo = int(sys.argv[2])
+        tfNo = int(sys.argv[3])
+        name = sys.argv[4] if len(sys.argv) > 4 else 'latest'
+
+        RenderBenchmark().run(rhoNo, phiNo, tfNo, name)
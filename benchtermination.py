@@ -0,0 +1,135 @@
+import json
+import os
+import sys
+import time
+
+import colordiff
+from benchrender import RenderBenchmark
+from dataset import Dataset
+from hybridrenderer import HybridRenderer
+from model.boundaryaccuratemodel import BoundaryAccurateModel
+from model.hybridmodel import HybridModel
+from model.splinemodel import SplineModel
+from model.voxelmodel import VoxelModel
+from renderer import Renderer
+from screen import Screen
+from splineplane import SplinePlane
+from voxelcriterion.geometriccriterion import GeometricCriterion
+
+
+class TerminationBenchmark(RenderBenchmark):
+    '''
+    Renders each model at a range of early ray termination thresholds and
+    records the samples saved and the color difference it costs, both against
+    the reference model and against the same model without early termination
+    '''
+    def __init__(self):
+        RenderBenchmark.__init__(self)
+
+        self.thresholds = [1.0, 0.999, 0.995, 0.99, 0.98, 0.95]
+        self.numPixels = 100
+        self.delta = 1e-2
+        self.texDimSize = 64
+
+    def render(self, renderer, model, threshold):
+        model.terminationThreshold = threshold
+        renderer.instrument = True
+
+        start = time.time()
+        renderResult = renderer.render(model, self.delta)
+        seconds = time.time() - start
+
+        model.terminationThreshold = 1.0
+
+        return renderResult, seconds
+
+    def run(self, rhoNo=1, phiNo=1, tfNo=1, name='latest'):
+        dataset = Dataset(rhoNo, phiNo, tfNo)
+
+        tf = dataset.tf
+        phiPlane = SplinePlane(dataset.phi, self.splineInterval, 1e-5)
+        boundingBox = phiPlane.createBoundingBox()
+
+        refSplineModel = SplineModel(tf, phiPlane, dataset.rho, self.refTolerance)
+        directSplineModel = SplineModel(tf, phiPlane, dataset.rho)
+
+        texSize = self.texDimSize
+        scalarTexture = self.readTexture(dataset, refSplineModel, boundingBox, texSize)
+
+        screen = Screen(self.screenBottom, self.screenTop, self.numPixels)
+        renderer = Renderer(self.eye, screen)
+        hybridRenderer = HybridRenderer(self.eye, screen)
+
+        criterion = GeometricCriterion(screen.pixelWidth, boundingBox.getWidth() / float(texSize),
+                                       boundingBox.getHeight() / float(texSize))
+
+        voxelModel = VoxelModel(tf, scalarTexture, boundingBox)
+
+        models = [('reference', renderer, refSplineModel),
+                  ('direct', renderer, directSplineModel),
+                  ('voxel', renderer, voxelModel),
+                  ('ba', renderer, BoundaryAccurateModel(tf, directSplineModel, voxelModel)),
+                  ('hybrid', hybridRenderer, HybridModel(tf, directSplineModel, voxelModel, criterion))]
+
+        referenceColors = None
+        runs = []
+
+        for modelName, modelRenderer, model in models:
+            fullResult = None
+
+            for threshold in self.thresholds:
+                renderResult, seconds = self.render(modelRenderer, model, threshold)
+
+                if fullResult is None:
+                    fullResult = renderResult
+
+                if referenceColors is None:
+                    referenceColors = renderResult.colors
+
+                referenceDiffs = colordiff.compare(referenceColors, renderResult.colors)
+                terminationDiffs = colordiff.compare(fullResult.colors, renderResult.colors)
+                saved = fullResult.totalSamplePoints - renderResult.totalSamplePoints
+
+                print "{:<9} threshold {:<6} samples {:>7} ({:>6} saved, {:.1%}) saturated {:>4}  dE ref {:.3f}/{:.3f}  dE full {:.3f}/{:.3f}".format(
+                    modelName, threshold, renderResult.totalSamplePoints, saved,
+                    saved / float(max(fullResult.totalSamplePoints, 1)), renderResult.counters.saturations,
+                    referenceDiffs.mean(), referenceDiffs.max(), terminationDiffs.mean(), terminationDiffs.max())
+
+                runs.append({
+                    'model' : modelName,
+                    'threshold' : threshold,
+                    'seconds' : seconds,
+                    'samples' : renderResult.totalSamplePoints,
+                    'samplesSaved' : saved,
+                    'saturations' : renderResult.counters.saturations,
+                    'meanDeltaE' : float(referenceDiffs.mean()),
+                    'maxDeltaE' : float(referenceDiffs.max()),
+                    'meanTerminationDeltaE' : float(terminationDiffs.mean()),
+                    'maxTerminationDeltaE' : float(terminationDiffs.max())
+                })
+
+        if not os.path.exists(self.outputDir):
+            os.makedirs(self.outputDir)
+
+        path = self.filepath(dataset, 'termination_' + name)
+
+        with open(path, 'w') as f:
+            json.dump({
+                'dataset' : [rhoNo, phiNo, tfNo],
+                'date' : time.strftime('%Y-%m-%d %H:%M:%S'),
+                'pixels' : self.numPixels,
+                'delta' : self.delta,
+                'texSize' : texSize,
+                'runs' : runs
+            }, f, indent=1, sort_keys=True)
+
+        print "Wrote {}".format(path)
+
+
+if __name__ == '__main__':
+    rhoNo = int(sys.argv[1])
+    phiNo = int(sys.argv[2])
+    tfNo = int(sys.argv[3])
+    name = sys.argv[4] if len(sys.argv) > 4 else 'latest'
+
+    TerminationBenchmark().run(rhoNo, phiNo, tfNo, name)
@@ -0,0 +1,29 @@
+import numpy as np
+
+
+def interpolate(data, xRange, yRange, xs, ys):
+    '''
+    Evaluates data given on the regular grid spanning xRange x yRange at each
+    point (xs[i], ys[i]). Equivalent to interp2d(kind='linear') called point by
+    point, with points outside the grid clamped to its border
+    '''
+    rows, cols = data.shape
+
+    x = (np.clip(xs, xRange[0], xRange[1]) - xRange[0]) / (xRange[1] - xRange[0]) * (cols - 1)
+    y = (np.clip(ys, yRange[0], yRange[1]) - yRange[0]) / (yRange[1] - yRange[0]) * (rows - 1)
+
+    i = np.minimum(np.floor(x).astype(int), cols - 2)
+    j = np.minimum(np.floor(y).astype(int), rows - 2)
+
+    fx = x - i
+    fy = y - j
+
+    return ((1.0 - fy) * ((1.0 - fx) * data[j, i] + fx * data[j, i+1]) +
+            fy * ((1.0 - fx) * data[j+1, i] + fx * data[j+1, i+1]))
+
+
+def closestIndices(xs, ys, cols, rows):
+    '''
+    Texel indices (into ghost cell padded data) of the texels containing the points
+    '''
+    return np.floor(ys * rows).astype(int) + 1, np.floor(xs * cols).astype(int) + 1
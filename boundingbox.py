@@ -1,7 +1,6 @@
 import numpy as np
 
 from intersection import Intersection
-from side import Side
 
 
 class BoundingBox:
@@ -23,42 +22,80 @@ class BoundingBox:
     def enclosesPoint(self, point):
         return self.enclosesXY(point[0], point[1])
 
-    def __findIntersection(self, side, ray):
-        point = None
+    def clip(self, rays):
+        '''
+        Slab test for a RayBatch or OrthoRayBundle. Returns arrays (tIn, tOut)
+        of the parameters, from the pixels, where the ray lines enter and
+        leave the box. tIn > tOut for lines missing it, including lines
+        parallel to a side and outside its slab
+        '''
+        lower = [self.left, self.bottom]
+        upper = [self.right, self.top]
 
-        if side == Side.BOTTOM or side == Side.TOP:
-            y = self.top if side == Side.TOP else self.bottom
+        count = len(rays.pixels)
+        tIn = np.full(count, -np.inf)
+        tOut = np.full(count, np.inf)
 
-            t = (y - ray.eye[1]) / ray.viewDir[1]
-            x = ray.eye[0] + t * ray.viewDir[0]
+        for axis in range(2):
+            d = rays.viewDirs[:, axis]
+            p = rays.pixels[:, axis]
 
-            if self.left <= x <= self.right:
-                point = np.array([x, y])
-        else:
-            x = self.left if side == Side.LEFT else self.right
+            parallel = d == 0.0
+            outside = parallel & ((p < lower[axis]) | (p > upper[axis]))
+            tIn[outside] = np.inf
+            tOut[outside] = -np.inf
 
-            t = (x - ray.eye[0]) / ray.viewDir[0]
-            y = ray.eye[1] + t * ray.viewDir[1]
+            crossing = ~parallel
+            t0 = (lower[axis] - p[crossing]) / d[crossing]
+            t1 = (upper[axis] - p[crossing]) / d[crossing]
+            tIn[crossing] = np.maximum(tIn[crossing], np.minimum(t0, t1))
+            tOut[crossing] = np.minimum(tOut[crossing], np.maximum(t0, t1))
 
-            if self.bottom <= y <= self.top:
-                point = np.array([x, y])
+        return tIn, tOut
 
-        if point is None:
-            return None
-        else:
-            return Intersection(None, point, None)
+    def __intersection(self, pixel, viewDir, t):
+        x = min(max(pixel[0] + t*viewDir[0], self.left), self.right)
+        y = min(max(pixel[1] + t*viewDir[1], self.bottom), self.top)
 
+        return Intersection(None, np.array([x, y]), t)
 
     def findTwoIntersections(self, ray):
-        result = []
+        '''
+        Returns the entry and exit intersections of the ray line, ordered by
+        the ray parameter, or None if it misses the box
+        '''
+        pixel = ray.pixel
+        viewDir = ray.viewDir
+
+        tIn = -float('inf')
+        tOut = float('inf')
+
+        for d, p, lower, upper in ((viewDir[0], pixel[0], self.left, self.right),
+                                   (viewDir[1], pixel[1], self.bottom, self.top)):
+            if d == 0.0:
+                if p < lower or p > upper:
+                    return None
+            else:
+                t0 = (lower - p) / d
+                t1 = (upper - p) / d
+
+                tIn = max(tIn, min(t0, t1))
+                tOut = min(tOut, max(t0, t1))
+
+        if tIn > tOut:
+            return None
 
-        for side in Side.sides:
-            intersection = self.__findIntersection(side, ray)
+        return np.asarray([self.__intersection(pixel, viewDir, tIn), self.__intersection(pixel, viewDir, tOut)])
 
-            if intersection is not None:
-                result.append(intersection)
+    def findTwoIntersectionsMany(self, rays):
+        '''findTwoIntersections for each ray of a RayBatch, from one vectorized slab test'''
+        tIn, tOut = self.clip(rays)
+        result = []
 
-        if len(result) < 2:
-            return None
+        for pixel, viewDir, t0, t1 in zip(rays.pixels, rays.viewDirs, tIn, tOut):
+            if t0 > t1:
+                result.append(None)
+            else:
+                result.append(np.asarray([self.__intersection(pixel, viewDir, t0), self.__intersection(pixel, viewDir, t1)]))
 
-        return np.asarray(result)
+        return result
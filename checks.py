@@ -0,0 +1,239 @@
+'''
+Regression checks of the optimized code paths against the plain ones they
+replaced or batch up. Run with make check, which fails if any check does
+'''
+import multiprocessing
+import numpy as np
+import sys
+
+import newton
+from dataset import Dataset
+from emptyspace import EmptySpaceGrid
+from model.splinemodel import SplineModel
+from orthoray import OrthoRayBundle
+from raybatch import RayBatch
+from splineplane import SplinePlane
+from texture import Texture2D
+
+
+def printflush(string):
+    sys.stdout.write(string)
+    sys.stdout.flush()
+
+
+def keepMask(grid, us, vs):
+    '''
+    The per-sample mask EmptySpaceGrid.keepRanges replaced: looks up the cell
+    of every sample and masks the runs of skippable ones
+    '''
+    i = np.clip(np.floor(vs * grid.textureRows).astype(int) / grid.cellSize, 0, grid.rows - 1)
+    j = np.clip(np.floor(us * grid.textureCols).astype(int) / grid.cellSize, 0, grid.cols - 1)
+
+    empty = grid.empty[i, j]
+    transparent = grid.transparent[i, j] & ~empty
+
+    keep = ~empty
+    skippable = empty | transparent
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], skippable, [False])).astype(int)))
+
+    for begin, end in zip(edges[::2], edges[1::2]):
+        members = begin + np.flatnonzero(transparent[begin:end])
+
+        if len(members) < 3:
+            continue
+
+        low = grid.minimums[i[members], j[members]].min()
+        high = grid.maximums[i[members], j[members]].max()
+
+        if grid.visibility.transparent(low, high):
+            keep[members[1:-1]] = False
+
+    return keep
+
+
+class RegressionChecks:
+    def __init__(self):
+        self.splineInterval = [0.0, 1.0]
+        self.tolerance = 1e-5
+
+        self.datasets = [(1, 1, 1), (1, 1, 2), (2, 2, 2)]
+        self.texDimSize = 32
+        self.rayCount = 300
+        self.evaluationCount = 1000
+        self.processes = 4
+
+        self.pool = None
+
+    def createModel(self, rhoNo, phiNo, tfNo):
+        dataset = Dataset(rhoNo, phiNo, tfNo)
+        phiPlane = SplinePlane(dataset.phi, self.splineInterval, self.tolerance)
+
+        return SplineModel(dataset.tf, phiPlane, dataset.rho, self.tolerance)
+
+    def checkKeepRanges(self, datasetNumbers, model):
+        '''EmptySpaceGrid.keepRanges keeps exactly the samples keepMask keeps'''
+        bb = model.phiPlane.createBoundingBox()
+        size = self.texDimSize
+        texture = Texture2D(model.generateScalarMatrix(bb, size, size, self.tolerance))
+        random = np.random.RandomState(0)
+        errors = []
+
+        for cellSize in [1, 2, 4, 8]:
+            grid = EmptySpaceGrid(texture, model.transfer, cellSize)
+
+            for r in range(self.rayCount):
+                u, v = random.uniform(-0.2, 1.2, 2)
+                angle = random.uniform(0, 2*np.pi)
+                step = random.uniform(0.002, 0.05)
+                du = step * np.cos(angle)
+                dv = step * np.sin(angle)
+                count = random.randint(0, int(1.5 / step))
+
+                ks = np.arange(count)
+                expected = keepMask(grid, u + ks*du, v + ks*dv)
+
+                kept = np.zeros(count, dtype=bool)
+
+                for begin, end in grid.keepRanges(u, v, du, dv, count):
+                    kept[begin:end] = True
+
+                differ = np.flatnonzero(kept != expected)
+
+                if len(differ) > 0:
+                    errors.append('{} cell size {} ray {}: {} of {} samples differ, first {}'.format(
+                        datasetNumbers, cellSize, r, len(differ), count, differ[0]))
+
+        return errors
+
+    def checkPoolVoxelization(self, datasetNumbers, model):
+        '''Voxelizing over a pool gives the serial result bit for bit, with the same Newton counts'''
+        bb = model.phiPlane.createBoundingBox()
+        size = self.texDimSize
+        errors = []
+
+        # Warm started from the grid of a coarser voxelization, as Main2 does
+        model.generateScalarMatrix(bb, size / 2, size / 2, self.tolerance)
+
+        for warmStart in [None, model.voxelizationGrid]:
+            serialCounters = newton.Counters()
+            poolCounters = newton.Counters()
+
+            serial = model.generateScalarMatrix(bb, size, size, self.tolerance, warmStart=warmStart,
+                                                counters=serialCounters)
+            pooled = model.generateScalarMatrix(bb, size, size, self.tolerance, warmStart=warmStart,
+                                                pool=self.pool, counters=poolCounters)
+
+            name = 'warm started' if warmStart is not None else 'cold'
+
+            if not np.array_equal(serial, pooled):
+                errors.append('{} {}: {} texels differ'.format(datasetNumbers, name, (serial != pooled).sum()))
+
+            if (serialCounters.newtonIterations, serialCounters.newtonFailures) != \
+                    (poolCounters.newtonIterations, poolCounters.newtonFailures):
+                errors.append('{} {}: Newton counts differ'.format(datasetNumbers, name))
+
+        return errors
+
+    def checkEvaluateMany(self, datasetNumbers, model):
+        '''evaluateMany of the fields and geometries gives evaluate at each point exactly'''
+        interval = self.splineInterval
+        random = np.random.RandomState(0)
+        errors = []
+
+        us = random.uniform(interval[0], interval[1], self.evaluationCount)
+        vs = random.uniform(interval[0], interval[1], self.evaluationCount)
+
+        # The corners and the sides of the parameter domain too
+        us[:8] = [interval[0], interval[1], interval[0], interval[1], interval[0], interval[1], 0.5, 0.5]
+        vs[:8] = [interval[0], interval[0], interval[1], interval[1], 0.5, 0.5, interval[0], interval[1]]
+
+        for name, spline in [('rho', model.rho), ('phi', model.phiPlane.phi)]:
+            if not hasattr(spline, 'evaluateMany'):
+                continue
+
+            many = spline.evaluateMany(us, vs)
+            single = np.array([spline.evaluate(u, v) for u, v in zip(us, vs)]).reshape(many.shape)
+
+            if not np.array_equal(many, single):
+                errors.append('{} {}: {} values differ, by up to {}'.format(
+                    datasetNumbers, name, (many != single).sum(), np.abs(many - single).max()))
+
+        return errors
+
+    def createRayBatches(self, bb):
+        '''Random rays around bb, with rays along the axes and through its corners among them'''
+        random = np.random.RandomState(0)
+        count = self.rayCount
+        center = np.array([(bb.left + bb.right) / 2.0, (bb.bottom + bb.top) / 2.0])
+        extent = np.array([bb.getWidth(), bb.getHeight()])
+
+        eyes = center + random.uniform(-1.5, 1.5, (count, 2)) * extent
+        pixels = center + random.uniform(-1.0, 1.0, (count, 2)) * extent
+
+        # Rays along each axis, inside and outside the box's slabs
+        pixels[:count/8, 0] = eyes[:count/8, 0]
+        pixels[count/8:count/4, 1] = eyes[count/8:count/4, 1]
+
+        corners = np.array([[bb.left, bb.bottom], [bb.right, bb.bottom], [bb.left, bb.top], [bb.right, bb.top]])
+        pixels[count/4:count/4+4] = corners
+
+        orthoPixels = np.column_stack((np.full(count, bb.left - 1.0),
+                                       np.linspace(bb.bottom - 0.5, bb.top + 0.5, count)))
+
+        return [('RayBatch', RayBatch(eyes, pixels, 0.01)),
+                ('OrthoRayBundle', OrthoRayBundle(orthoPixels, [1.0, 0.0], 1.0)),
+                ('tilted OrthoRayBundle', OrthoRayBundle(orthoPixels, [1.0, 0.3], 1.0))]
+
+    def checkBoundingBoxClip(self, datasetNumbers, model):
+        '''BoundingBox.findTwoIntersectionsMany, from clip, agrees with findTwoIntersections on each ray'''
+        bb = model.phiPlane.createBoundingBox()
+        errors = []
+
+        for name, rays in self.createRayBatches(bb):
+            many = bb.findTwoIntersectionsMany(rays)
+            hits = rays.hits(bb)
+
+            for i, ray in enumerate(rays):
+                single = bb.findTwoIntersections(ray)
+
+                if (single is None) != (many[i] is None) or (single is None) == hits[i]:
+                    errors.append('{} {} ray {}: hit differs'.format(datasetNumbers, name, i))
+                elif single is not None:
+                    for a, b in zip(single, many[i]):
+                        if a.lineParam != b.lineParam or not np.array_equal(a.geomPoint, b.geomPoint):
+                            errors.append('{} {} ray {}: intersections differ'.format(datasetNumbers, name, i))
+                            break
+
+        return errors
+
+    def checks(self):
+        return [self.checkKeepRanges, self.checkPoolVoxelization, self.checkEvaluateMany, self.checkBoundingBoxClip]
+
+    def run(self):
+        failed = 0
+        self.pool = multiprocessing.Pool(self.processes)
+
+        for datasetNumbers in self.datasets:
+            model = self.createModel(*datasetNumbers)
+
+            for check in self.checks():
+                printflush("{} {}... ".format(check.__name__, datasetNumbers))
+                errors = check(datasetNumbers, model)
+
+                if len(errors) == 0:
+                    print "ok"
+                else:
+                    print "FAILED"
+                    failed += 1
+
+                    for error in errors[:10]:
+                        print "  " + error
+
+        self.pool.close()
+
+        return failed
+
+
+if __name__ == '__main__':
+    sys.exit(1 if RegressionChecks().run() > 0 else 0)
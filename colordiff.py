@@ -1,15 +1,11 @@
+import functools
 import numpy as np
 from skimage import color
 
 def convertToLabs(rgbas):
-    labs = np.empty((len(rgbas), 3))
+    rgbs = np.asarray(rgbas, dtype=np.float)[:, :3]
     
-    for i, rgba in enumerate(rgbas):
-        rgb = rgba[:3]
-        arg = np.array([[rgb]], dtype=np.float)
-        labs[i] = color.rgb2lab(arg)
-        
-    return labs
+    return color.rgb2lab(rgbs[np.newaxis])[0]
     
 def compare(referenceRgbas, comparisonRgbas):
     referenceLabs = convertToLabs(referenceRgbas)
@@ -18,11 +14,20 @@ def compare(referenceRgbas, comparisonRgbas):
     n = len(comparisonLabs)
     m = len(referenceLabs) / n
     
-    diff = np.zeros(n)
+    # The reference may be supersampled, with m consecutive samples per pixel
+    referenceLabs = referenceLabs[:n*m].reshape((n, m, 3))
+    diffs = color.deltaE_ciede2000(referenceLabs, comparisonLabs[:, np.newaxis, :])
     
-    for i in range(m):
-        diff += color.deltaE_ciede2000(referenceLabs[i::m], comparisonLabs)
-        
-    diff /= m
+    return np.mean(diffs, axis=1)
+
+def compareMany(referenceRgbas, comparisonRgbasList, pool=None):
+    '''
+    Compares each of comparisonRgbasList against the reference, distributed over
+    pool (e.g. a multiprocessing.Pool) if given
+    '''
+    compareWithReference = functools.partial(compare, referenceRgbas)
+    
+    if pool is None:
+        return map(compareWithReference, comparisonRgbasList)
     
-    return diff
+    return pool.map(compareWithReference, comparisonRgbasList)
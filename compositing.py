@@ -43,12 +43,15 @@ def accumulate(dst, src, delta):
 
 
 class FrontToBack:
-    def __init__(self, transfer, superSamplingSteps=20):
+    def __init__(self, transfer, superSamplingSteps=20, terminationThreshold=1.0):
         self.dst = np.zeros(4)
         self.prevSample = None
         self.superSamplingSteps = superSamplingSteps
         self.transfer = transfer
 
+        # Opacity at which the ray is considered saturated
+        self.terminationThreshold = terminationThreshold
+
     def addSample(self, sample, delta):
         prevSample = self.prevSample
         steps = self.superSamplingSteps
@@ -72,4 +75,4 @@ class FrontToBack:
         self.prevSample = sample
 
     def saturated(self):
-        return self.dst[3] >= 1.0
+        return self.dst[3] >= self.terminationThreshold
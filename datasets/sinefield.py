@@ -13,3 +13,9 @@ class SineField(Field):
         b = 0.5 + 0.5 * math.sin(2 * math.pi * v)
 
         return np.array([a * b])
+
+    def evaluateMany(self, us, vs):
+        a = 0.5 + 0.5 * np.sin(2 * math.pi * np.asarray(us, dtype=float))
+        b = 0.5 + 0.5 * np.sin(2 * math.pi * np.asarray(vs, dtype=float))
+
+        return (a * b)[:, np.newaxis]
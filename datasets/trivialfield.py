@@ -9,3 +9,6 @@ class TrivialField(Field):
 
     def evaluate(self, u, v):
         return np.array([v])
+
+    def evaluateMany(self, us, vs):
+        return np.array(vs, dtype=float).reshape((-1, 1))
@@ -0,0 +1,156 @@
+import math
+import numpy as np
+
+
+class TransferVisibility(object):
+    '''
+    Answers whether a transfer function is fully transparent over a scalar
+    range. Transfer functions given as interp1d are piecewise linear, so their
+    knots decide it exactly. Others are checked at evenly spaced scalars
+    '''
+    def __init__(self, transfer, samples=1024):
+        self.transfer = transfer
+
+        if hasattr(transfer, 'x') and hasattr(transfer, 'y'):
+            scalars = np.asarray(transfer.x, dtype=float)
+        else:
+            scalars = np.linspace(0.0, 1.0, samples)
+
+        self.scalars = scalars
+        self.visible = np.asarray(transfer(scalars))[:, 3] > 0.0
+
+    def transparent(self, low, high):
+        # The compositing clamps scalars to [0, 1]
+        low = min(max(low, 0.0), 1.0)
+        high = min(max(high, 0.0), 1.0)
+
+        if self.transfer(low)[3] > 0.0 or self.transfer(high)[3] > 0.0:
+            return False
+
+        between = (self.scalars > low) & (self.scalars < high)
+
+        return not self.visible[between].any()
+
+
+class EmptySpaceGrid(object):
+    '''
+    Min/max macro-cells of cellSize x cellSize texels over a voxel texture.
+    A cell is empty if every texel its samples interpolate from is
+    non-resident (-1), and transparent if the transfer function is fully
+    transparent over the range of those texels
+    '''
+    def __init__(self, texture, transfer, cellSize=4):
+        # Ghost cell padded texels, as the textures interpolate them
+        if hasattr(texture, 'textureData'):
+            data = texture.textureData
+        else:
+            data = texture.texels
+
+        self.visibility = TransferVisibility(transfer)
+        self.cellSize = cellSize
+        self.textureCols = texture.cols
+        self.textureRows = texture.rows
+
+        cols = (texture.cols + cellSize - 1) / cellSize
+        rows = (texture.rows + cellSize - 1) / cellSize
+
+        self.minimums = np.empty((rows, cols))
+        self.maximums = np.empty((rows, cols))
+        self.empty = np.empty((rows, cols), dtype=bool)
+        self.transparent = np.empty((rows, cols), dtype=bool)
+
+        for i in range(rows):
+            for j in range(cols):
+                # A point in the cell interpolates from the padded texels up to
+                # one past the cell on either side
+                support = data[i*cellSize:(i+1)*cellSize+2, j*cellSize:(j+1)*cellSize+2]
+
+                self.minimums[i, j] = support.min()
+                self.maximums[i, j] = support.max()
+                self.empty[i, j] = (support == -1).all()
+                self.transparent[i, j] = self.visibility.transparent(support.min(), support.max())
+
+        self.rows = rows
+        self.cols = cols
+
+    def __cells(self, u, v, du, dv, count):
+        '''
+        Walks the cells the samples (u + k*du, v + k*dv), k < count, fall in,
+        as a DDA, returning (i, j, begin, end) for each run of samples
+        [begin, end) in cell (i, j). Samples outside the texture fall in its
+        edge cells
+        '''
+        x = u * self.textureCols / float(self.cellSize)
+        y = v * self.textureRows / float(self.cellSize)
+        dx = du * self.textureCols / float(self.cellSize)
+        dy = dv * self.textureRows / float(self.cellSize)
+
+        cells = []
+        k = 0
+
+        while k < count:
+            j = min(max(int(math.floor(x + k*dx)), 0), self.cols - 1)
+            i = min(max(int(math.floor(y + k*dy)), 0), self.rows - 1)
+
+            end = min(self.__crossing(x, dx, j, self.cols), self.__crossing(y, dy, i, self.rows), count)
+            end = max(end, k + 1)
+
+            cells.append((i, j, k, end))
+            k = end
+
+        return cells
+
+    @staticmethod
+    def __crossing(x, dx, cell, cells):
+        '''First k with x + k*dx past cell along dx, or infinity if it stays in it'''
+        if dx > 0.0 and cell < cells - 1:
+            return int(math.ceil((cell + 1 - x) / dx))
+        elif dx < 0.0 and cell > 0:
+            return int(math.floor((cell - x) / dx)) + 1
+
+        return float('inf')
+
+    def keepRanges(self, u, v, du, dv, count):
+        '''
+        Which of the samples (u + k*du, v + k*dv), k < count, consecutive
+        texture coordinates along a ray, need sampling, as a list of index
+        ranges [begin, end). Only the cells the samples pass through are
+        visited. Samples in empty cells would be non-resident, so all are
+        dropped. Of a run of samples in empty or transparent cells, the first
+        and last transparent ones are kept and the rest dropped, provided the
+        transfer function is transparent over the run's whole scalar range.
+        The compositing between the kept ones then adds nothing, as before
+        '''
+        ranges = []
+        run = []
+
+        for cell in self.__cells(u, v, du, dv, count) + [None]:
+            if cell is not None:
+                (i, j, begin, end) = cell
+
+                if self.empty[i, j]:
+                    continue
+
+                if self.transparent[i, j]:
+                    run.append(cell)
+                    continue
+
+            # A non-skippable cell, or the end of the ray, ends the run
+            if sum(end - begin for (_, _, begin, end) in run) >= 3 and self.__runTransparent(run):
+                ranges.append((run[0][2], run[0][2] + 1))
+                ranges.append((run[-1][3] - 1, run[-1][3]))
+            else:
+                ranges.extend((begin, end) for (_, _, begin, end) in run)
+
+            run = []
+
+            if cell is not None:
+                ranges.append((begin, end))
+
+        return ranges
+
+    def __runTransparent(self, run):
+        low = min(self.minimums[i, j] for (i, j, _, _) in run)
+        high = max(self.maximums[i, j] for (i, j, _, _) in run)
+
+        return self.visibility.transparent(low, high)
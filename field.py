@@ -1,4 +1,5 @@
 import abc
+import numpy as np
 
 
 class Field(object):
@@ -10,3 +11,7 @@ class Field(object):
     @abc.abstractmethod
     def evaluate(self, u, v):
         return
+
+    def evaluateMany(self, us, vs):
+        '''evaluate at each (us[i], vs[i]), with the results as rows'''
+        return np.array([self.evaluate(u, v) for u, v in zip(us, vs)])
@@ -0,0 +1,178 @@
+import numpy as np
+import os
+
+import instrumentation
+from hybridrenderer import HybridRenderingResult
+from renderdata import RenderData
+from renderer import RenderingResult
+
+
+class ResultStore:
+    '''
+    Keeps every render of a dataset as columns of a single .npz file. Columns
+    are read on first access, so rows can be selected on the metadata without
+    loading colours or ratios. Appended rows are buffered until write
+    '''
+    filename = 'results.npz'
+
+    def __init__(self, filedir):
+        self.filedir = filedir
+        self.filepath = '{}/{}'.format(filedir, ResultStore.filename)
+
+        self.renderDatas = []
+        self.data = None
+        self.columns = {}
+
+        # Whether renderDatas holds the rows already in the file
+        self.loaded = False
+
+    def exists(self):
+        return os.path.isfile(self.filepath)
+
+    def clear(self):
+        self.renderDatas = []
+        self.data = None
+        self.columns = {}
+        self.loaded = True
+
+        if self.exists():
+            os.remove(self.filepath)
+
+    def append(self, renderData):
+        '''Buffers renderData after the rows already in the file, until write'''
+        if not self.loaded:
+            self.renderDatas = [self.load(i) for i in range(self.count())] if self.exists() else []
+            self.loaded = True
+
+        self.renderDatas.append(renderData)
+
+    def write(self):
+        renderDatas = self.renderDatas
+        count = len(renderDatas)
+
+        if count == 0:
+            return
+
+        numPixels = len(renderDatas[0].renderResult.colors)
+
+        hybrid = np.zeros(count, dtype=bool)
+        ratios = np.zeros((count, numPixels))
+        renderTimes = np.empty(count)
+
+        instrumented = np.zeros(count, dtype=bool)
+        phaseTimes = np.zeros((count, len(instrumentation.phaseNames)))
+        sampleTypeCounts = np.zeros((count, instrumentation.sampleTypeCount), dtype=int)
+        counts = np.zeros((count, 5), dtype=int)
+
+        for i, renderData in enumerate(renderDatas):
+            renderResult = renderData.renderResult
+
+            if isinstance(renderResult, HybridRenderingResult):
+                hybrid[i] = True
+                ratios[i] = renderResult.ratios
+
+            counters = getattr(renderResult, 'counters', None)
+
+            # Only instrumented renders have phase times worth keeping
+            if counters is not None and counters.timed:
+                instrumented[i] = True
+                phaseTimes[i] = counters.phaseTimes
+                sampleTypeCounts[i] = counters.sampleTypeCounts
+                counts[i] = [counters.rays, counters.hits, counters.newtonIterations,
+                             counters.newtonFailures, counters.saturations]
+
+            renderTime = getattr(renderData, 'renderTime', None)
+            renderTimes[i] = np.nan if renderTime is None else renderTime
+
+        directory = self.filedir
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        np.savez(self.filepath,
+                 modelType=np.array([renderData.modelType for renderData in renderDatas], dtype=int),
+                 delta=np.array([renderData.delta for renderData in renderDatas], dtype=float),
+                 texSize=np.array([renderData.texSize for renderData in renderDatas], dtype=int),
+                 renderTime=renderTimes,
+                 maxSamplePoints=np.array([renderData.renderResult.maxSamplePoints for renderData in renderDatas], dtype=int),
+                 colors=np.array([renderData.renderResult.colors for renderData in renderDatas]),
+                 hybrid=hybrid,
+                 ratios=ratios,
+                 instrumented=instrumented,
+                 phaseTimes=phaseTimes,
+                 sampleTypeCounts=sampleTypeCounts,
+                 counts=counts)
+
+        self.data = None
+        self.columns = {}
+
+    def column(self, name):
+        if name not in self.columns:
+            if self.data is None:
+                self.data = np.load(self.filepath)
+
+            self.columns[name] = self.data[name]
+
+        return self.columns[name]
+
+    def hasColumn(self, name):
+        if self.data is None:
+            self.data = np.load(self.filepath)
+
+        return name in self.data.files
+
+    def count(self):
+        return len(self.column('modelType'))
+
+    def find(self, modelTypes=None, texSizes=None):
+        selected = np.ones(self.count(), dtype=bool)
+
+        if modelTypes is not None:
+            selected &= np.in1d(self.column('modelType'), modelTypes)
+
+        if texSizes is not None:
+            selected &= np.in1d(self.column('texSize'), texSizes)
+
+        return np.flatnonzero(selected)
+
+    def load(self, index):
+        colors = self.column('colors')[index]
+        maxSamplePoints = int(self.column('maxSamplePoints')[index])
+
+        if self.column('hybrid')[index]:
+            renderResult = HybridRenderingResult(colors, maxSamplePoints, self.column('ratios')[index])
+        else:
+            renderResult = RenderingResult(colors, maxSamplePoints)
+
+        modelType = int(self.column('modelType')[index])
+        delta = float(self.column('delta')[index])
+        texSize = int(self.column('texSize')[index])
+
+        renderData = RenderData(modelType, delta, texSize)
+        renderData.renderResult = renderResult
+
+        renderTime = float(self.column('renderTime')[index])
+        renderData.renderTime = None if np.isnan(renderTime) else renderTime
+
+        # Stores written before instrumentation have no counter columns
+        if self.hasColumn('instrumented') and self.column('instrumented')[index]:
+            counters = instrumentation.RenderCounters()
+            counters.phaseTimes = self.column('phaseTimes')[index]
+            counters.sampleTypeCounts = self.column('sampleTypeCounts')[index]
+            [counters.rays, counters.hits, counters.newtonIterations,
+             counters.newtonFailures, counters.saturations] = [int(c) for c in self.column('counts')[index]]
+            renderResult.counters = counters
+
+        return renderData
+
+
+def importPickles(fileHandler, resultStore):
+    '''
+    Converts a directory of one-pickle-per-render results into resultStore
+    '''
+    resultStore.clear()
+
+    for filename in fileHandler.findAll():
+        resultStore.append(fileHandler.load(filename))
+
+    resultStore.write()
@@ -32,3 +32,23 @@ def write(dataset, array):
     path = __filepath(dataset, width, height)
     
     np.save(path, array)
+
+def __tilepath(dataset, width, height, tolerance, tileSize, tileRow, tileCol):
+    directory = "{}/{}x{}_tol{:g}_tiles{}".format(__filedir(dataset), width, height, tolerance, tileSize)
+    return directory, "{}/{},{}.npy".format(directory, tileRow, tileCol)
+
+def tileExist(dataset, width, height, tolerance, tileSize, tileRow, tileCol):
+    directory, path = __tilepath(dataset, width, height, tolerance, tileSize, tileRow, tileCol)
+    return os.path.isfile(path)
+
+def readTile(dataset, width, height, tolerance, tileSize, tileRow, tileCol):
+    directory, path = __tilepath(dataset, width, height, tolerance, tileSize, tileRow, tileCol)
+    return np.load(path)
+
+def writeTile(dataset, width, height, tolerance, tileSize, tileRow, tileCol, tile):
+    directory, path = __tilepath(dataset, width, height, tolerance, tileSize, tileRow, tileCol)
+    
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    
+    np.save(path, tile)
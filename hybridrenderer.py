@@ -1,12 +1,12 @@
 import numpy as np
 
-from ray import Ray2D
+from model.basemodel import RayContext
 from renderer import Renderer, RenderingResult
 
 
 class HybridRenderingResult(RenderingResult):
-    def __init__(self, colors, maxSamplePoints, ratios):
-        super(HybridRenderingResult, self).__init__(colors, maxSamplePoints)
+    def __init__(self, colors, maxSamplePoints, ratios, totalSamplePoints=0):
+        super(HybridRenderingResult, self).__init__(colors, maxSamplePoints, totalSamplePoints)
         self.ratios = ratios
 
 
@@ -14,27 +14,17 @@ class HybridRenderer(Renderer):
     def __init__(self, eye, screen):
         super(HybridRenderer, self).__init__(eye, screen)
 
-    def render(self, model, delta, plotter=None):
-        numPixels = self.screen.numPixels
-        pixels = self.screen.pixels
-        pixelWidth = self.screen.pixelWidth
+    def createRayContexts(self, model, viewRays, counters):
+        # The criterion is evaluated once for the whole batch
+        switchDistances = model.criterion.switchDistances(viewRays)
 
-        colors = np.zeros((numPixels, 4))
-        maxSamplePoints = 0
+        return [RayContext(counters, switchDistance) for switchDistance in switchDistances]
 
-        ratios = np.zeros(numPixels)
-
-        for i, pixel, in enumerate(pixels):
-            viewRay = Ray2D(self.eye, pixel, 10, pixelWidth)
-
-            if plotter is not None and self.plotViewRays:
-                plotter.plotViewRay(viewRay, [0, 10])
-
-            result = model.raycast(viewRay, delta, plotter)
+    def createResult(self, colors, maxSamplePoints, totalSamplePoints, raycastResults):
+        ratios = np.zeros(len(raycastResults))
 
+        for i, result in enumerate(raycastResults):
             if result.color is not None:
-                colors[i] = result.color
-                maxSamplePoints = max(result.samples, maxSamplePoints)
-                ratios[i] = model.voxelRatio()
+                ratios[i] = result.voxelRatio
 
-        return HybridRenderingResult(colors, maxSamplePoints, ratios)
+        return HybridRenderingResult(colors, maxSamplePoints, ratios, totalSamplePoints)
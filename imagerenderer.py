@@ -0,0 +1,92 @@
+import math
+import numpy as np
+
+from raybatch import RayBatch
+from screen import Screen
+
+
+class ImageRenderingResult(object):
+    def __init__(self, image, rowResults):
+        # (rows, pixels per row, 4) array of colors
+        self.image = image
+        self.rowResults = rowResults
+
+
+class ImageRenderer(object):
+    '''
+    Renders a stack of 1D screens into a 2D image, one row per list of view
+    rays. The model, and with it the texture and spline plane, is shared by
+    all rows. With coherentRows, the intersections of each ray are seeded
+    from those of the same pixel in the previous row
+    '''
+    def __init__(self, renderer, rows):
+        self.renderer = renderer
+        self.rows = rows
+
+        self.coherentRows = True
+
+    def render(self, model, delta):
+        rowResults = []
+        seedIntersections = None
+
+        for viewRays in self.rows:
+            if not self.coherentRows or seedIntersections is None or len(seedIntersections) != len(viewRays):
+                seedIntersections = None
+
+            rowResult = self.renderer.renderRays(model, delta, viewRays, seedIntersections=seedIntersections)
+            rowResults.append(rowResult)
+            seedIntersections = rowResult.splineIntersections
+
+        image = np.array([rowResult.colors for rowResult in rowResults])
+
+        return ImageRenderingResult(image, rowResults)
+
+
+def screenRays(eye, screen):
+    return RayBatch.fromScreen(eye, screen)
+
+def eyeSweepRows(eyes, screen):
+    '''One row per eye position, all looking through the same screen'''
+    return [screenRays(eye, screen) for eye in eyes]
+
+def screenOffsetRows(eye, screen, offsets):
+    '''One row per offset vector, moving the screen while the eye stays put'''
+    rows = []
+
+    for offset in offsets:
+        offsetScreen = Screen(screen.bottom + offset, screen.top + offset, screen.numPixels)
+        rows.append(screenRays(eye, offsetScreen))
+
+    return rows
+
+def orthographicRows(boundingBox, numPixels, angles):
+    '''
+    One row per view angle (radians from the x axis), each with numPixels
+    parallel rays covering the bounding box. RayBatch places the pixel extent
+    vertically, so the angles should stay well within +-pi/4
+    '''
+    bb = boundingBox
+    corners = np.array([[bb.left, bb.bottom], [bb.right, bb.bottom], [bb.left, bb.top], [bb.right, bb.top]])
+
+    # The eye is placed far enough behind each pixel that the frustum stays
+    # close to the pixel width across the box
+    eyeDistance = math.sqrt(bb.getWidth()**2 + bb.getHeight()**2)
+
+    rows = []
+
+    for angle in angles:
+        viewDir = np.array([math.cos(angle), math.sin(angle)])
+        screenDir = np.array([-viewDir[1], viewDir[0]])
+
+        depths = corners.dot(viewDir)
+        offsets = corners.dot(screenDir)
+
+        pixelWidth = (offsets.max() - offsets.min()) / numPixels
+        pixelOffsets = np.linspace(offsets.min() + pixelWidth/2, offsets.max() - pixelWidth/2, numPixels)
+
+        pixels = screenDir*pixelOffsets[:, np.newaxis] + viewDir*depths.min()
+        eyes = pixels - viewDir*eyeDistance
+
+        rows.append(RayBatch(eyes, pixels, pixelWidth))
+
+    return rows
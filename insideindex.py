@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class InsideIndex:
+    '''
+    Point-in-geometry test for a SplinePlane. The four boundary curves are
+    approximated by a closed polyline, which answers exactly for points
+    further than band from it. Points within the band are decided by
+    inverting phi with Newton
+    '''
+    def __init__(self, phiPlane, segmentsPerSide=64, tolerance=1e-5):
+        self.phiPlane = phiPlane
+        self.tolerance = tolerance
+
+        lower, upper = phiPlane.interval
+        params = np.linspace(lower, upper, segmentsPerSide + 1)[:-1]
+        reversedParams = upper - (params - lower)
+        lowers = np.ones_like(params) * lower
+        uppers = np.ones_like(params) * upper
+
+        # Around the parameter domain: bottom, right, top, left
+        us = np.concatenate((params, uppers, reversedParams, lowers))
+        vs = np.concatenate((lowers, params, uppers, reversedParams))
+
+        self.vertexParams = np.column_stack((us, vs))
+        vertices = np.array([phiPlane.evaluate(u, v) for u, v in self.vertexParams])
+
+        self.x0 = vertices[:, 0]
+        self.y0 = vertices[:, 1]
+        self.x1 = np.roll(self.x0, -1)
+        self.y1 = np.roll(self.y0, -1)
+
+        # The curves bulge at most this far from their chords, estimated at the
+        # segment midpoints
+        midParams = (self.vertexParams + np.roll(self.vertexParams, -1, axis=0)) / 2.0
+        midPoints = np.array([phiPlane.evaluate(u, v) for u, v in midParams])
+        bulges = np.hypot(midPoints[:, 0] - (self.x0 + self.x1)/2.0, midPoints[:, 1] - (self.y0 + self.y1)/2.0)
+        self.band = 2.0*bulges.max() + tolerance
+
+    def __crossings(self, xs, ys):
+        '''Returns inside, distance to the polyline and nearest edge for arrays of points'''
+        xs = xs[:, np.newaxis]
+        ys = ys[:, np.newaxis]
+        x0, y0, x1, y1 = self.x0, self.y0, self.x1, self.y1
+
+        # Crossing number of a ray in the +x direction
+        straddles = (y0 > ys) != (y1 > ys)
+        dy = np.where(y1 != y0, y1 - y0, 1.0)
+        xCross = x0 + (ys - y0) * (x1 - x0) / dy
+        inside = (np.sum(straddles & (xs < xCross), axis=1) % 2) == 1
+
+        ex = x1 - x0
+        ey = y1 - y0
+        lengthSq = np.where(ex*ex + ey*ey > 0.0, ex*ex + ey*ey, 1.0)
+        t = np.clip(((xs - x0)*ex + (ys - y0)*ey) / lengthSq, 0.0, 1.0)
+        distances = np.hypot(xs - (x0 + t*ex), ys - (y0 + t*ey))
+
+        return inside, distances.min(axis=1), distances.argmin(axis=1)
+
+    def __newtonContains(self, point, edgeIndex):
+        uvGuess = self.vertexParams[edgeIndex]
+        uv = self.phiPlane.inverseWithinTolerance(np.asarray(point), uvGuess, self.tolerance)
+
+        return uv is not None
+
+    def containsMany(self, xs, ys):
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+
+        inside, distances, edges = self.__crossings(xs, ys)
+
+        for i in np.flatnonzero(distances < self.band):
+            inside[i] = self.__newtonContains([xs[i], ys[i]], edges[i])
+
+        return inside
+
+    def contains(self, point):
+        return self.containsMany([point[0]], [point[1]])[0]
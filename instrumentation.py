@@ -0,0 +1,80 @@
+'''
+Render instrumentation. Renderers hand the RenderCounters of the render to
+model.raycast in each ray's RayContext, and the hot paths add their event
+counts to the counters they are passed. Wall time is only added to timed
+counters, the hooks doing nothing beyond checking for them otherwise
+'''
+import numpy as np
+import time
+
+import newton
+
+INTERSECTION = 0
+NEWTON = 1
+FETCH = 2
+COMPOSITING = 3
+
+phaseNames = ['intersection', 'newton', 'fetch', 'compositing']
+
+# Sample types are SamplingType values, which are all below this
+sampleTypeCount = 20
+
+
+class RenderCounters(newton.Counters):
+    def __init__(self, timed=True):
+        super(RenderCounters, self).__init__()
+
+        self.timed = timed
+        self.phaseTimes = np.zeros(len(phaseNames))
+        self.rays = 0
+        self.hits = 0
+        self.sampleTypeCounts = np.zeros(sampleTypeCount, dtype=int)
+        self.saturations = 0
+
+    def samples(self):
+        return int(self.sampleTypeCounts.sum())
+
+    def printData(self):
+        if self.timed:
+            for i, phaseName in enumerate(phaseNames):
+                print "{:<12} = {:.3f}s".format(phaseName, self.phaseTimes[i])
+
+        print "rays         = {} ({} hits)".format(self.rays, self.hits)
+        print "samples      = {}".format(self.samples())
+
+        for sampleType in np.flatnonzero(self.sampleTypeCounts):
+            print "  type {:<6} = {}".format(sampleType, self.sampleTypeCounts[sampleType])
+
+        print "newton its   = {}".format(self.newtonIterations)
+        print "newton fails = {}".format(self.newtonFailures)
+        print "saturations  = {}".format(self.saturations)
+
+
+def clock(counters):
+    '''
+    Returns the start time for addTime, or None when counters are not timed
+    RenderCounters. Plain newton.Counters never are
+    '''
+    if not getattr(counters, 'timed', False):
+        return None
+
+    return time.time()
+
+def addTime(counters, phase, start):
+    if start is not None:
+        counters.phaseTimes[phase] += time.time() - start
+
+def countRay(counters, hit):
+    if counters is not None:
+        counters.rays += 1
+
+        if hit:
+            counters.hits += 1
+
+def countSamples(counters, sampleTypes, saturated):
+    if counters is not None:
+        for sampleType in sampleTypes:
+            counters.sampleTypeCounts[sampleType] += 1
+
+        if saturated:
+            counters.saturations += 1
@@ -1,10 +1,13 @@
 import math
 
-class Intersection:
-    def __init__(self, paramPoint, geomPoint, lineParam):
+class Intersection(object):
+    __slots__ = ('paramPoint', 'geomPoint', 'lineParam', 'side')
+
+    def __init__(self, paramPoint, geomPoint, lineParam, side=None):
         self.paramPoint = paramPoint
         self.geomPoint = geomPoint
         self.lineParam = lineParam
+        self.side = side
 
     def alreadyIn(self, intersects, tolerance):
         result = False
@@ -0,0 +1,97 @@
+import math
+import numpy as np
+
+
+class InverseGrid:
+    '''
+    Approximate inverse of a SplinePlane on a regular grid over its bounding
+    box. Each cell centre holds its (u, v), or -1 if it lies outside the
+    geometry
+    '''
+    outside = -1
+
+    def __init__(self, boundingBox, paramPoints):
+        '''
+        paramPoints holds one row per cell row, bottom to top, as given by
+        SplineModel.approximateSamplePoints: a (u, v) or None per cell, or an
+        empty row if the row misses the geometry
+        '''
+        bb = boundingBox
+        rows = len(paramPoints)
+        cols = max([len(rowParamPoints) for rowParamPoints in paramPoints] + [0])
+
+        self.params = np.ones((rows, cols, 2)) * InverseGrid.outside
+
+        for i, rowParamPoints in enumerate(paramPoints):
+            for j, paramPoint in enumerate(rowParamPoints):
+                if paramPoint is not None:
+                    self.params[i, j] = paramPoint
+
+        self.inside = self.params[:, :, 0] != InverseGrid.outside
+
+        self.rows = rows
+        self.cols = cols
+        self.left = bb.left
+        self.bottom = bb.bottom
+        self.cellWidth = bb.getWidth() / float(max(cols, 1))
+        self.cellHeight = bb.getHeight() / float(max(rows, 1))
+
+    def __corners(self, point):
+        '''
+        Returns the row and column indices of the bilinear patch around point
+        and the fractions within it. A grid one cell wide or high has both
+        indices the same along that axis
+        '''
+        x = (point[0] - self.left) / self.cellWidth - 0.5
+        y = (point[1] - self.bottom) / self.cellHeight - 0.5
+
+        j = min(max(int(math.floor(x)), 0), max(self.cols - 2, 0))
+        i = min(max(int(math.floor(y)), 0), max(self.rows - 2, 0))
+
+        fx = min(max(x - j, 0.0), 1.0)
+        fy = min(max(y - i, 0.0), 1.0)
+
+        return (i, min(i + 1, self.rows - 1)), (j, min(j + 1, self.cols - 1)), fx, fy
+
+    def seed(self, point):
+        '''
+        Bilinearly interpolates (u, v) at point from the surrounding cell
+        centres inside the geometry. Returns None if none of them are
+        '''
+        if self.rows == 0 or self.cols == 0:
+            return None
+
+        (i0, i1), (j0, j1), fx, fy = self.__corners(point)
+        inside = self.inside
+        params = self.params
+
+        weightSum = 0.0
+        u = 0.0
+        v = 0.0
+
+        for i, j, weight in ((i0, j0, (1-fx)*(1-fy)), (i0, j1, fx*(1-fy)), (i1, j0, (1-fx)*fy), (i1, j1, fx*fy)):
+            if inside[i, j] and weight > 0.0:
+                weightSum += weight
+                u += weight * params[i, j, 0]
+                v += weight * params[i, j, 1]
+
+        if weightSum == 0.0:
+            return None
+
+        return [u / weightSum, v / weightSum]
+
+    def isOutside(self, point, margin=1):
+        '''
+        True if point lies outside the grid, or if the cell centres around it,
+        and margin cells beyond them, are all outside the geometry. Parts of
+        the geometry thinner than the cells can be missed
+        '''
+        x = (point[0] - self.left) / self.cellWidth
+        y = (point[1] - self.bottom) / self.cellHeight
+
+        if not (0 <= x <= self.cols and 0 <= y <= self.rows):
+            return True
+
+        (i0, i1), (j0, j1), fx, fy = self.__corners(point)
+
+        return not self.inside[max(i0 - margin, 0):i1 + margin + 1, max(j0 - margin, 0):j1 + margin + 1].any()
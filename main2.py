@@ -1,10 +1,12 @@
 import numpy as np
 import sys
+import time
 
 import fileio.voxelio as voxelio
 import colordiff
+import summary
 from dataset import Dataset
-from fileio.filehandler import FileHandler
+from fileio.resultstore import ResultStore
 from model.boundaryaccuratemodel import BoundaryAccurateModel
 from model.hybridmodel import HybridModel
 from model.splinemodel import SplineModel
@@ -17,7 +19,6 @@ from renderdata import RenderData
 from renderer import Renderer
 from screen import Screen
 from splineplane import SplinePlane
-from summary import Summary
 from texture import Texture2D
 from voxelcriterion.geometriccriterion import GeometricCriterion
 
@@ -47,25 +48,34 @@ class Main2:
         self.texDimSizes = np.array([8, 16, 32, 64, 128, 256, 512, 1024])
         self.numTextures = len(self.texDimSizes)
 
-        self.numFiles = 0
-        self.fileHandler = FileHandler()
+        self.resultStore = None
+
+        # Record per-phase times and counts with each render
+        self.instrument = True
+
+        # Let the voxel models skip empty and transparent macro-cells
+        self.emptySpace = False
 
     @staticmethod
     def filedir(dataset):
         return 'output/results/{},{},{}'.format(dataset.rhoNumber, dataset.phiNumber, dataset.tfNumber)
 
-    def save(self, dataset, obj):
-        filedir = self.filedir(dataset)
-        filename = '{0:03d}'.format(self.numFiles)
+    def save(self, obj):
+        self.resultStore.append(obj)
+
+    def render(self, renderer, model, renderData):
+        renderer.instrument = self.instrument
 
-        self.fileHandler.setFiledir(filedir)
-        self.fileHandler.save(obj, filename)
+        start = time.time()
+        renderData.renderResult = renderer.render(model, renderData.delta)
+        renderData.renderTime = time.time() - start
 
-        self.numFiles += 1
+        self.save(renderData)
 
-    def run(self, rhoNo=1, phiNo=1, tfNo=1):
+    def run(self, rhoNo=1, phiNo=1, tfNo=1, pool=None):
         dataset = Dataset(rhoNo, phiNo, tfNo)
-        self.numFiles = 0
+        self.resultStore = ResultStore(self.filedir(dataset))
+        self.resultStore.clear()
 
         renderer = Renderer(self.eye, self.screen)
         hybridRenderer = HybridRenderer(self.eye, self.screen)
@@ -96,7 +106,9 @@ class Main2:
                 print "Read {}x{} texture data from file".format(texDimSize, texDimSize)
             else:
                 samplingScalars = refSplineModel.generateScalarMatrix(boundingBox, texDimSize, texDimSize,
-                                                                      self.voxelizationTolerance)
+                                                                      self.voxelizationTolerance,
+                                                                      warmStart=refSplineModel.voxelizationGrid,
+                                                                      pool=pool)
                 voxelio.write(dataset, samplingScalars)
                 print "Wrote {}x{} texture data to file".format(texDimSize, texDimSize)
 
@@ -107,21 +119,23 @@ class Main2:
             criterion = GeometricCriterion(self.screen.pixelWidth, voxelWidth, voxelHeight)
 
             voxelModels[i] = VoxelModel(tf, scalarTexture, boundingBox)
+
+            if self.emptySpace:
+                voxelModels[i].createEmptySpaceGrid()
+
             baModels[i] = BoundaryAccurateModel(tf, directSplineModel, voxelModels[i])
             hybridModels[i] = HybridModel(tf, directSplineModel, voxelModels[i], criterion)
             baHybridModels[i] = HybridModel(tf, directSplineModel, baModels[i], criterion)
 
         printflush("Rendering reference... ")
         renderData = RenderData(ModelType.REFERENCE, viewRayDeltaRef)
-        renderData.renderResult = renderer.render(refSplineModel, viewRayDeltaRef)
-        self.save(dataset, renderData)
+        self.render(renderer, refSplineModel, renderData)
         print "Done!"
 
         if not self.autoDelta:
             printflush("Rendering direct... ")
             renderData = RenderData(ModelType.DIRECT, self.viewRayDelta)
-            renderData.renderResult = renderer.render(directSplineModel, self.viewRayDelta)
-            self.save(dataset, renderData)
+            self.render(renderer, directSplineModel, renderData)
             print "Done!"
 
         for i, texSize in enumerate(self.texDimSizes):
@@ -131,56 +145,37 @@ class Main2:
 
                 printflush("Rendering direct...")
                 renderData = RenderData(ModelType.DIRECT, delta)
-                renderData.renderResult = renderer.render(directSplineModel, delta)
-                self.save(dataset, renderData)
+                self.render(renderer, directSplineModel, renderData)
                 print "Done!"
             else:
                 delta = self.viewRayDelta
 
             printflush("Rendering voxelized ({0}x{0})...".format(texSize))
             renderData = RenderData(ModelType.VOXEL, delta=delta, texSize=texSize)
-            renderData.renderResult = renderer.render(voxelModels[i], delta)
-            self.save(dataset, renderData)
+            self.render(renderer, voxelModels[i], renderData)
             print "Done!"
 
             printflush("Rendering boundary accurate ({0}x{0})...".format(texSize))
             renderData = RenderData(ModelType.BOUNDARYACCURATE, delta=delta, texSize=texSize)
-            renderData.renderResult = renderer.render(baModels[i], delta)
-            self.save(dataset, renderData)
+            self.render(renderer, baModels[i], renderData)
             print "Done!"
 
             printflush("Rendering hybrid ({0}x{0})...".format(texSize))
             renderData = RenderData(ModelType.HYBRID, delta=delta, texSize=texSize)
-            renderData.renderResult = hybridRenderer.render(hybridModels[i], delta)
-            self.save(dataset, renderData)
+            self.render(hybridRenderer, hybridModels[i], renderData)
             print "Done!"
 
             printflush("Rendering hybrid (boundary accurate) ({0}x{0})...".format(texSize))
             renderData = RenderData(ModelType.BAHYBRID, delta=delta, texSize=texSize)
-            renderData.renderResult = hybridRenderer.render(baHybridModels[i], delta)
-            self.save(dataset, renderData)
+            self.render(hybridRenderer, baHybridModels[i], renderData)
             print "Done!"
 
-    def createSummaries(self, dataset):
-        result = []
-
-        for i in range(ModelType._COUNT):
-            result.append([])
-
-        filedir = self.filedir(dataset)
-        self.fileHandler.setFiledir(filedir)
-
-        files = self.fileHandler.findAll()
-        refObj = self.fileHandler.load(files[0])
-
-        for i in range(1, len(files)):
-            obj = self.fileHandler.load(files[i])
+        self.resultStore.write()
 
-            colorDiffs = colordiff.compare(refObj.renderResult.colors, obj.renderResult.colors)
-            summary = Summary(obj, colorDiffs)
-            result[obj.modelType].append(summary)
+    def createSummaries(self, dataset, pool=None, modelTypes=None, texSizes=None):
+        resultStore = ResultStore(self.filedir(dataset))
 
-        return result
+        return summary.createSummaries(resultStore, pool, modelTypes, texSizes)
 
     def duplicateDirectSummary(self, summaries):
         summary = summaries[ModelType.DIRECT][0]
@@ -216,16 +211,15 @@ class Main2:
         baHybridPixels = []
         baHybridVoxelRatios = []
 
-        filedir = self.filedir(dataset)
-        self.fileHandler.setFiledir(filedir)
+        resultStore = ResultStore(self.filedir(dataset))
 
-        files = self.fileHandler.findAll()
-        refObj = self.fileHandler.load(files[0])
+        refObj = resultStore.load(resultStore.find([ModelType.REFERENCE])[0])
         refPixels = refObj.renderResult.colors
         pixelFigure.refPixelsPlot.plotPixelColors(refPixels)
 
-        for i in range(1, len(files)):
-            obj = self.fileHandler.load(files[i])
+        for i in resultStore.find([ModelType.DIRECT, ModelType.VOXEL, ModelType.BOUNDARYACCURATE,
+                                   ModelType.HYBRID, ModelType.BAHYBRID]):
+            obj = resultStore.load(i)
             objPixels = obj.renderResult.colors
 
             if obj.modelType == ModelType.DIRECT:
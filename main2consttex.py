@@ -1,10 +1,11 @@
 import numpy as np
 import sys
+import time
 
 import fileio.voxelio as voxelio
-import colordiff
+import summary
 from dataset import Dataset
-from fileio.filehandler import FileHandler
+from fileio.resultstore import ResultStore
 from model.boundaryaccuratemodel import BoundaryAccurateModel
 from model.hybridmodel import HybridModel
 from model.splinemodel import SplineModel
@@ -16,7 +17,6 @@ from renderdata import RenderData
 from renderer import Renderer
 from screen import Screen
 from splineplane import SplinePlane
-from summary import Summary
 from texture import Texture2D
 from voxelcriterion.geometriccriterion import GeometricCriterion
 
@@ -47,25 +47,31 @@ class Main2:
         self.texDimSize = 128
         self.numTextures = 1
 
-        self.numFiles = 0
-        self.fileHandler = FileHandler()
+        self.resultStore = None
+
+        # Record per-phase times and counts with each render
+        self.instrument = True
 
     @staticmethod
     def filedir(dataset):
         return 'output/results/{},{},{}'.format(dataset.rhoNumber, dataset.phiNumber, dataset.tfNumber)
 
-    def save(self, dataset, obj):
-        filedir = self.filedir(dataset)
-        filename = '{0:03d}'.format(self.numFiles)
+    def save(self, obj):
+        self.resultStore.append(obj)
+
+    def render(self, renderer, model, renderData):
+        renderer.instrument = self.instrument
 
-        self.fileHandler.setFiledir(filedir)
-        self.fileHandler.save(obj, filename)
+        start = time.time()
+        renderData.renderResult = renderer.render(model, renderData.delta)
+        renderData.renderTime = time.time() - start
 
-        self.numFiles += 1
+        self.save(renderData)
 
     def run(self, rhoNo=1, phiNo=1, tfNo=1):
         dataset = Dataset(rhoNo, phiNo, tfNo)
-        self.numFiles = 0
+        self.resultStore = ResultStore(self.filedir(dataset))
+        self.resultStore.clear()
 
         renderer = Renderer(self.eye, self.screen)
         hybridRenderer = HybridRenderer(self.eye, self.screen)
@@ -110,8 +116,7 @@ class Main2:
 
         printflush("Rendering reference... ")
         renderData = RenderData(ModelType.REFERENCE, self.viewRayDeltaRef)
-        renderData.renderResult = renderer.render(refSplineModel, self.viewRayDeltaRef)
-        self.save(dataset, renderData)
+        self.render(renderer, refSplineModel, renderData)
         print "Done!"
 
         for delta in self.viewRayDeltas:
@@ -119,55 +124,36 @@ class Main2:
 
             printflush("Rendering direct (delta = {})...".format(delta))
             renderData = RenderData(ModelType.DIRECT, delta)
-            renderData.renderResult = renderer.render(directSplineModel, delta)
-            self.save(dataset, renderData)
+            self.render(renderer, directSplineModel, renderData)
             print "Done!"
 
             printflush("Rendering voxelized (delta = {})...".format(delta))
             renderData = RenderData(ModelType.VOXEL, delta=delta, texSize=texSize)
-            renderData.renderResult = renderer.render(voxelModels[i], delta)
-            self.save(dataset, renderData)
+            self.render(renderer, voxelModels[i], renderData)
             print "Done!"
 
             if self.allMethods:
                 printflush("Rendering boundary accurate (delta = {})...".format(delta))
                 renderData = RenderData(ModelType.BOUNDARYACCURATE, delta=delta, texSize=texSize)
-                renderData.renderResult = renderer.render(baModels[i], delta)
-                self.save(dataset, renderData)
+                self.render(renderer, baModels[i], renderData)
                 print "Done!"
 
                 printflush("Rendering hybrid (delta = {})...".format(delta))
                 renderData = RenderData(ModelType.HYBRID, delta=delta, texSize=texSize)
-                renderData.renderResult = hybridRenderer.render(hybridModels[i], delta)
-                self.save(dataset, renderData)
+                self.render(hybridRenderer, hybridModels[i], renderData)
                 print "Done!"
 
                 printflush("Rendering hybrid (delta = {})...".format(delta))
                 renderData = RenderData(ModelType.BAHYBRID, delta=delta, texSize=texSize)
-                renderData.renderResult = hybridRenderer.render(baHybridModels[i], delta)
-                self.save(dataset, renderData)
+                self.render(hybridRenderer, baHybridModels[i], renderData)
                 print "Done!"
 
-    def createSummaries(self, dataset):
-        result = []
-
-        for i in range(ModelType._COUNT):
-            result.append([])
-
-        filedir = self.filedir(dataset)
-        self.fileHandler.setFiledir(filedir)
-
-        files = self.fileHandler.findAll()
-        refObj = self.fileHandler.load(files[0])
-
-        for i in range(1, len(files)):
-            obj = self.fileHandler.load(files[i])
+        self.resultStore.write()
 
-            colorDiffs = colordiff.compare(refObj.renderResult.colors, obj.renderResult.colors)
-            summary = Summary(obj, colorDiffs)
-            result[obj.modelType].append(summary)
+    def createSummaries(self, dataset, pool=None):
+        resultStore = ResultStore(self.filedir(dataset))
 
-        return result
+        return summary.createSummaries(resultStore, pool)
 
     def duplicateDirectSummary(self, summaries):
         summary = summaries[ModelType.DIRECT][0]
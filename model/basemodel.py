@@ -2,6 +2,7 @@ import abc
 import math
 import numpy as np
 
+import instrumentation
 from compositing import FrontToBack
 
 
@@ -9,7 +10,58 @@ def magnitude(v):
     return math.sqrt(sum(v[i]*v[i] for i in range(len(v))))
 
 
+def segmentSamplePoints(inGeomPoint, outGeomPoint, viewDirDelta):
+    samplePoints = []
+
+    maxDistance = magnitude(outGeomPoint - inGeomPoint)
+    samplePoint = inGeomPoint + viewDirDelta
+
+    while magnitude(samplePoint - inGeomPoint) < maxDistance:
+        samplePoints.append(np.array(samplePoint))
+        samplePoint += viewDirDelta
+
+    return samplePoints
+
+
+class SamplePoints(object):
+    '''
+    The sample points segmentSamplePoints gives, evenly spaced from the in
+    to the out point, but each computed on access. Indexing with a slice
+    gives an array of points
+    '''
+    __slots__ = ('first', 'step', 'count')
+
+    def __init__(self, inGeomPoint, outGeomPoint, viewDirDelta):
+        maxDistance = magnitude(outGeomPoint - inGeomPoint)
+
+        self.first = inGeomPoint + viewDirDelta
+        self.step = viewDirDelta
+        self.count = max(int(math.ceil(maxDistance / magnitude(viewDirDelta))) - 1, 0)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            ks = np.arange(*index.indices(self.count))
+            return self.first + ks[:, np.newaxis] * self.step
+
+        if index < 0:
+            index += self.count
+
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+
+        return self.first + index * self.step
+
+    def __iter__(self):
+        for k in xrange(self.count):
+            yield self[k]
+
+
 class Sample(object):
+    __slots__ = ('geomPoint', 'scalar', 'type')
+
     def __init__(self, geomPoint, scalar, thetype):
         self.geomPoint = geomPoint
         self.scalar = scalar
@@ -17,9 +69,29 @@ class Sample(object):
 
 
 class RaycastResult(object):
-    def __init__(self, color, samples):
+    __slots__ = ('color', 'samples', 'modelSamples')
+
+    def __init__(self, color, samples, modelSamples=None):
         self.color = color
         self.samples = samples
+        self.modelSamples = modelSamples
+
+
+class RayContext(object):
+    '''
+    Render state of one view ray, kept off the ray itself: the RenderCounters
+    of the render, the hybrid criterion's switch distance if the renderer
+    evaluated it for the whole batch, and the spline intersections seeding
+    the ray's. Spline models record the intersections they find in
+    splineIntersections
+    '''
+    __slots__ = ('counters', 'switchDistance', 'seedIntersections', 'splineIntersections')
+
+    def __init__(self, counters=None, switchDistance=None, seedIntersections=None):
+        self.counters = counters
+        self.switchDistance = switchDistance
+        self.seedIntersections = seedIntersections
+        self.splineIntersections = None
 
 
 class BaseModel(object):
@@ -27,78 +99,128 @@ class BaseModel(object):
     
     def __init__(self, transfer):
         self.transfer = transfer
+
+        # Early ray termination once the composited opacity reaches this
+        self.terminationThreshold = 1.0
+
+    def beginRender(self, viewRays):
+        '''Called by the renderers with the RayBatch of each render, before its first ray'''
+        pass
     
     @abc.abstractmethod
-    def sample(self, samplePoint, prevSample, viewRay, delta):
+    def sample(self, samplePoint, prevSample, viewRay, delta, context):
         return
     
     @abc.abstractmethod
-    def inSample(self, intersection, viewRay):
+    def inSample(self, intersection, viewRay, context):
         return
     
     @abc.abstractmethod
-    def outSample(self, intersection, viewRay):
+    def outSample(self, intersection, viewRay, context):
         return
 
     @abc.abstractmethod
-    def findIntersections(self, viewRay):
+    def findIntersections(self, viewRay, context):
         return
     
-    def raycast(self, viewRay, delta, plotter=None):
-        geomPoints = []
-        sampleTypes = []
-
-        intersections = self.findIntersections(viewRay)
+    def samplePointsBetween(self, inGeomPoint, outGeomPoint, viewDirDelta):
+        '''The sample points raycast passes to sampleSegment'''
+        return segmentSamplePoints(inGeomPoint, outGeomPoint, viewDirDelta)
+
+    def sampleSegment(self, samplePoints, prevSample, viewRay, delta, context):
+        '''
+        Yields (samplePoint, sample) for consecutive sample points along the ray,
+        where sample is None for points outside the model
+        '''
+        sample = prevSample
+
+        for samplePoint in samplePoints:
+            sample = self.sample(samplePoint, sample, viewRay, delta, context)
+            yield samplePoint, sample
+
+    def raycast(self, viewRay, delta, plotter=None, context=None):
+        '''context is the RayContext of the render, if any'''
+        if context is None:
+            context = RayContext()
+
+        start = instrumentation.clock(context.counters)
+        intersections = self.findIntersections(viewRay, context)
+        instrumentation.addTime(context.counters, instrumentation.INTERSECTION, start)
 
         if intersections is None:
             return RaycastResult(None, 0)
-        
+
+        inGeomPoint = intersections[0].geomPoint
+        outGeomPoint = intersections[1].geomPoint
+        samplePoints = self.samplePointsBetween(inGeomPoint, outGeomPoint, viewRay.viewDir * delta)
+
+        return self.compositeSegments(intersections, self, [(self, samplePoints)], self, viewRay, delta, context, plotter)
+
+    def compositeSegments(self, intersections, inModel, segments, outModel, viewRay, delta, context, plotter=None):
+        '''
+        segments is a list of (model, samplePoints) covering the ray from the in
+        intersection to the out intersection, in order. The compositing state and
+        the previous sample carry over the joins between segments
+        '''
+        geomPoints = []
+        sampleTypes = []
+        modelSamples = {}
+
         inGeomPoint = intersections[0].geomPoint
         outGeomPoint = intersections[1].geomPoint
 
-        compositing = FrontToBack(self.transfer)
+        compositing = FrontToBack(self.transfer, terminationThreshold=self.terminationThreshold)
         
-        sample = self.inSample(intersections[0], viewRay)
+        sample = inModel.inSample(intersections[0], viewRay, context)
         
         if sample is not None:
             geomPoints.append(sample.geomPoint)
             sampleTypes.append(sample.type)
+            modelSamples[inModel] = modelSamples.get(inModel, 0) + 1
 
+            start = instrumentation.clock(context.counters)
             compositing.addSample(sample, delta)
+            instrumentation.addTime(context.counters, instrumentation.COMPOSITING, start)
             
-        viewDirDelta = viewRay.viewDir * delta
-        samplePoint = inGeomPoint + viewDirDelta
         prevSamplePoint = inGeomPoint
 
         saturated = False
 
-        while magnitude(samplePoint - inGeomPoint) < magnitude(outGeomPoint - inGeomPoint):
-            sample = self.sample(samplePoint, sample, viewRay, delta)
-            
-            if sample is not None:
-                geomPoints.append(sample.geomPoint)
-                sampleTypes.append(sample.type)
+        for model, samplePoints in segments:
+            for samplePoint, sample in model.sampleSegment(samplePoints, sample, viewRay, delta, context):
+                if sample is not None:
+                    geomPoints.append(sample.geomPoint)
+                    sampleTypes.append(sample.type)
+                    modelSamples[model] = modelSamples.get(model, 0) + 1
 
-                compositing.addSample(sample, magnitude(samplePoint - prevSamplePoint))
-                prevSamplePoint = np.array(samplePoint)
+                    start = instrumentation.clock(context.counters)
+                    compositing.addSample(sample, magnitude(samplePoint - prevSamplePoint))
+                    instrumentation.addTime(context.counters, instrumentation.COMPOSITING, start)
+                    prevSamplePoint = samplePoint
 
-                saturated = compositing.saturated()
+                    saturated = compositing.saturated()
 
-                if saturated:
-                    break
-            
-            samplePoint += viewDirDelta
+                    if saturated:
+                        break
+
+            if saturated:
+                break
 
         if not saturated:
-            sample = self.outSample(intersections[1], viewRay)
+            sample = outModel.outSample(intersections[1], viewRay, context)
 
             if sample is not None:
                 geomPoints.append(sample.geomPoint)
                 sampleTypes.append(sample.type)
+                modelSamples[outModel] = modelSamples.get(outModel, 0) + 1
 
+                start = instrumentation.clock(context.counters)
                 compositing.addSample(sample, magnitude(outGeomPoint - prevSamplePoint))
+                instrumentation.addTime(context.counters, instrumentation.COMPOSITING, start)
+
+        instrumentation.countSamples(context.counters, sampleTypes, saturated)
 
         if plotter is not None:
             plotter.plotSamplePoints(geomPoints, sampleTypes)
 
-        return RaycastResult(compositing.dst, len(geomPoints))
+        return RaycastResult(compositing.dst, len(geomPoints), modelSamples)
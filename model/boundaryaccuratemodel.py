@@ -8,14 +8,24 @@ class BoundaryAccurateModel(BaseModel):
         self.splineModel = splineModel
         self.voxelModel = voxelModel
 
-    def sample(self, samplePoint, prevSample, viewRay, delta):
-        return self.voxelModel.sample(samplePoint, prevSample, viewRay, delta)
+    def beginRender(self, viewRays):
+        self.splineModel.beginRender(viewRays)
+        self.voxelModel.beginRender(viewRays)
+
+    def sample(self, samplePoint, prevSample, viewRay, delta, context):
+        return self.voxelModel.sample(samplePoint, prevSample, viewRay, delta, context)
+
+    def samplePointsBetween(self, inGeomPoint, outGeomPoint, viewDirDelta):
+        return self.voxelModel.samplePointsBetween(inGeomPoint, outGeomPoint, viewDirDelta)
+
+    def sampleSegment(self, samplePoints, prevSample, viewRay, delta, context):
+        return self.voxelModel.sampleSegment(samplePoints, prevSample, viewRay, delta, context)
         
-    def inSample(self, intersection, viewRay):
-        return self.splineModel.inSample(intersection, viewRay)
+    def inSample(self, intersection, viewRay, context):
+        return self.splineModel.inSample(intersection, viewRay, context)
     
-    def outSample(self, intersection, viewRay):
-        return self.splineModel.outSample(intersection, viewRay)
+    def outSample(self, intersection, viewRay, context):
+        return self.splineModel.outSample(intersection, viewRay, context)
 
-    def findIntersections(self, viewRay):
-        return self.splineModel.findIntersections(viewRay)
+    def findIntersections(self, viewRay, context):
+        return self.splineModel.findIntersections(viewRay, context)
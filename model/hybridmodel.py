@@ -1,4 +1,15 @@
-from model.basemodel import BaseModel
+import numpy as np
+
+import instrumentation
+from model.basemodel import BaseModel, RayContext, RaycastResult, segmentSamplePoints
+
+
+class HybridRaycastResult(RaycastResult):
+    __slots__ = ('voxelRatio',)
+
+    def __init__(self, color, samples, modelSamples, voxelRatio):
+        super(HybridRaycastResult, self).__init__(color, samples, modelSamples)
+        self.voxelRatio = voxelRatio
 
 
 class HybridModel(BaseModel):
@@ -9,58 +20,117 @@ class HybridModel(BaseModel):
         self.splineModel = splineModel
         self.voxelModel = voxelModel
         
-        self.splineSamples = 0
-        self.voxelSamples = 0
-        
-    def __chooseModel(self, viewRay, samplePoint):
-        lodLevel = self.criterion.lodLevel(viewRay, samplePoint)
-        useVoxelized = lodLevel >= 0
-        
-        if useVoxelized:
-            self.voxelSamples += 1
+    def beginRender(self, viewRays):
+        self.splineModel.beginRender(viewRays)
+        self.voxelModel.beginRender(viewRays)
+
+    def __switchDistance(self, viewRay, context):
+        if context.switchDistance is not None:
+            return context.switchDistance
+
+        return self.criterion.switchDistance(viewRay)
+
+    def __chooseModel(self, switchDistance, viewRay, samplePoint):
+        farZ = samplePoint[0] - viewRay.eye[0]
+
+        if farZ > switchDistance:
             return self.voxelModel
         else:
-            self.splineSamples += 1
             return self.splineModel
         
-    def sample(self, samplePoint, prevSample, viewRay, delta):
-        model = self.__chooseModel(viewRay, samplePoint)
-        return model.sample(samplePoint, prevSample, viewRay, delta)
+    def sample(self, samplePoint, prevSample, viewRay, delta, context):
+        model = self.__chooseModel(self.__switchDistance(viewRay, context), viewRay, samplePoint)
+        return model.sample(samplePoint, prevSample, viewRay, delta, context)
     
-    def inSample(self, intersection, viewRay):
-        model = self.__chooseModel(viewRay, intersection.geomPoint)
-        return model.inSample(intersection, viewRay)
+    def inSample(self, intersection, viewRay, context):
+        model = self.__chooseModel(self.__switchDistance(viewRay, context), viewRay, intersection.geomPoint)
+        return model.inSample(intersection, viewRay, context)
     
-    def outSample(self, intersection, viewRay):
-        model = self.__chooseModel(viewRay, intersection.geomPoint)
-        return model.outSample(intersection, viewRay)
+    def outSample(self, intersection, viewRay, context):
+        model = self.__chooseModel(self.__switchDistance(viewRay, context), viewRay, intersection.geomPoint)
+        return model.outSample(intersection, viewRay, context)
 
-    def findIntersections(self, viewRay):
-        simpleIntersects = self.voxelModel.findIntersections(viewRay)
+    def __findIntersections(self, switchDistance, viewRay, context):
+        '''
+        Each end of the ray uses the intersection of the model the criterion
+        picks at that end
+        '''
+        simpleIntersects = self.voxelModel.findIntersections(viewRay, context)
 
         if simpleIntersects is None:
             return None
 
         simpleIn = simpleIntersects[0]
+        simpleOut = simpleIntersects[1]
 
-        model = self.__chooseModel(viewRay, simpleIn.geomPoint)
-
-        if model == self.voxelModel:
+        if self.__chooseModel(switchDistance, viewRay, simpleIn.geomPoint) == self.voxelModel:
             return simpleIntersects
-        else:
-            return self.splineModel.findIntersections(viewRay)
 
-    def voxelRatio(self):
-        x = self.voxelSamples
-        s = self.splineSamples
-        sum = x + s
+        splineIntersects = self.splineModel.findIntersections(viewRay, context)
+
+        if splineIntersects is None:
+            return None
 
-        if sum == 0:
-            return 0.0
+        splineOut = splineIntersects[1]
 
-        ratio = float(x) / sum
-        
-        self.splineSamples = 0
-        self.voxelSamples = 0
-        
-        return ratio
+        if self.__chooseModel(switchDistance, viewRay, splineOut.geomPoint) == self.splineModel:
+            return splineIntersects
+
+        if self.__chooseModel(switchDistance, viewRay, simpleOut.geomPoint) == self.splineModel:
+            return splineIntersects
+
+        return np.asarray([splineIntersects[0], simpleOut])
+
+    def findIntersections(self, viewRay, context):
+        return self.__findIntersections(self.__switchDistance(viewRay, context), viewRay, context)
+
+    def __partition(self, switchDistance, viewRay, samplePoints):
+        '''
+        Splits the sample points into contiguous (model, samplePoints) intervals
+        '''
+        segments = []
+
+        if len(samplePoints) == 0:
+            return segments
+
+        useVoxelized = np.asarray(samplePoints)[:, 0] - viewRay.eye[0] > switchDistance
+        joins = np.flatnonzero(useVoxelized[1:] != useVoxelized[:-1]) + 1
+        begins = np.concatenate(([0], joins))
+        ends = np.concatenate((joins, [len(samplePoints)]))
+
+        for begin, end in zip(begins, ends):
+            model = self.voxelModel if useVoxelized[begin] else self.splineModel
+            segments.append((model, samplePoints[begin:end]))
+
+        return segments
+
+    def raycast(self, viewRay, delta, plotter=None, context=None):
+        if context is None:
+            context = RayContext()
+
+        switchDistance = self.__switchDistance(viewRay, context)
+
+        start = instrumentation.clock(context.counters)
+        intersections = self.__findIntersections(switchDistance, viewRay, context)
+        instrumentation.addTime(context.counters, instrumentation.INTERSECTION, start)
+
+        if intersections is None:
+            return HybridRaycastResult(None, 0, {}, 0.0)
+
+        inGeomPoint = intersections[0].geomPoint
+        outGeomPoint = intersections[1].geomPoint
+        samplePoints = segmentSamplePoints(inGeomPoint, outGeomPoint, viewRay.viewDir * delta)
+
+        segments = self.__partition(switchDistance, viewRay, samplePoints)
+        inModel = self.__chooseModel(switchDistance, viewRay, inGeomPoint)
+        outModel = self.__chooseModel(switchDistance, viewRay, outGeomPoint)
+
+        result = self.compositeSegments(intersections, inModel, segments, outModel, viewRay, delta, context, plotter)
+
+        modelSamples = result.modelSamples
+        voxelRatio = 0.0
+
+        if result.samples > 0:
+            voxelRatio = modelSamples.get(self.voxelModel, 0) / float(result.samples)
+
+        return HybridRaycastResult(result.color, result.samples, modelSamples, voxelRatio)
@@ -1,18 +1,77 @@
+import bisect
 import numpy as np
 
-from model.basemodel import BaseModel, Sample
-from ray import Ray2D
+import voxelizer
+
+from inversegrid import InverseGrid
+from model.basemodel import BaseModel, Sample, magnitude
+from orthoray import OrthoRayBundle
 from samplingtype import SamplingType
 
 
 class SplineSample(Sample):
+    __slots__ = ('paramPoint',)
+
     def __init__(self, geomPoint, scalar, paramPoint):
         super(SplineSample, self).__init__(geomPoint, scalar, SamplingType.SPLINE_MODEL)
         self.paramPoint = paramPoint
 
 
+class ParamCache(object):
+    '''
+    Parameter points of the spline samples on the current and the previous
+    ray, by distance from the eye, for seeding samples at the same depth on
+    the next ray
+    '''
+    def __init__(self):
+        self.ray = None
+        self.depths = []
+        self.paramPoints = []
+        self.prevDepths = []
+        self.prevParamPoints = []
+
+    def begin(self, viewRay):
+        if viewRay is not self.ray:
+            self.ray = viewRay
+            self.prevDepths = self.depths
+            self.prevParamPoints = self.paramPoints
+            self.depths = []
+            self.paramPoints = []
+
+    @staticmethod
+    def depth(viewRay, point):
+        eye = viewRay.eye
+        viewDir = viewRay.viewDir
+
+        return (point[0]-eye[0])*viewDir[0] + (point[1]-eye[1])*viewDir[1]
+
+    def add(self, depth, paramPoint):
+        self.depths.append(depth)
+        self.paramPoints.append(paramPoint)
+
+    def guess(self, depth, delta):
+        '''Returns the previous ray's parameters within delta of depth, or None'''
+        depths = self.prevDepths
+
+        if len(depths) == 0:
+            return None
+
+        i = bisect.bisect_left(depths, depth)
+
+        if i == len(depths) or (i > 0 and depth - depths[i-1] < depths[i] - depth):
+            i -= 1
+
+        if abs(depths[i] - depth) > delta:
+            return None
+
+        return self.prevParamPoints[i]
+
+
 class SplineModel(BaseModel):
     samplingDefault = -1
+
+    # Sample points along a ray inverted before rho is evaluated over them
+    sampleBlockSize = 16
     
     def __init__(self, transfer, phiPlane, rho, samplingTolerance=None):
         super(SplineModel, self).__init__(transfer)
@@ -21,6 +80,20 @@ class SplineModel(BaseModel):
         self.rho = rho
         self.samplingTolerance = samplingTolerance
 
+        # Seed samples from the previous ray's parameters at the same depth
+        self.crossRayGuesses = False
+        self.paramCache = ParamCache()
+
+        # InverseGrid of the last generateScalarMatrix, to warm start the next resolution with
+        self.voxelizationGrid = None
+
+        # InverseGrid seeding the sampling inversions, if set by createInverseGrid
+        self.inverseGrid = None
+
+    def beginRender(self, viewRays):
+        # The previous render's last ray is no neighbour of this one's first
+        self.paramCache = ParamCache()
+
     def createSamplingRays(self, boundingBox, width, height):
         bb = boundingBox
         rayCount = height
@@ -30,16 +103,19 @@ class SplineModel(BaseModel):
         yDelta = float(bb.getHeight())/rayCount
 
         yValues = np.linspace(bb.bottom+yDelta/2, bb.top-yDelta/2, rayCount)
-
-        samplingRays = []
-
-        for y in yValues:
-            samplingRay = Ray2D(np.array([bb.left-xDelta/2, y]), np.array([bb.left, y]), 10, yDelta)
-            samplingRays.append(samplingRay)
-
-        return np.asarray(samplingRays)
-
-    def approximateSamplePoints(self, boundingBox, width, height, tolerance):
+        pixels = np.column_stack((np.ones(rayCount) * bb.left, yValues))
+
+        return OrthoRayBundle(pixels, np.array([1.0, 0.0]), xDelta/2)
+
+    def approximateSamplePoints(self, boundingBox, width, height, tolerance, warmStart=None, pool=None, counters=None,
+                                insideIndex=None):
+        '''
+        warmStart is an InverseGrid, typically of a coarser voxelization,
+        seeding each texel's inversion instead of the previous texel. Given a
+        pool, the scanlines are voxelized over it, see voxelizer. Newton
+        counts are added to counters, if given. Given an InsideIndex, texels
+        are tested with it instead of against the intersection x-range
+        '''
         phiPlane = self.phiPlane
         bb = boundingBox
         rayCount = height
@@ -51,61 +127,73 @@ class SplineModel(BaseModel):
         yValues = np.linspace(bb.bottom+yDelta/2, bb.top-yDelta/2, rayCount)
         xValues = np.linspace(bb.left+xDelta/2, bb.right-xDelta/2, samplingsPerRay)
 
-        geomPoints = []
-        paramPoints = []
+        geomPoints = [[] for i in range(rayCount)]
+        paramPoints = [[] for i in range(rayCount)]
         samplingRays = self.createSamplingRays(bb, width, height)
 
-        for i, samplingRay in enumerate(samplingRays):
-            rayGeomPoints = []
-            rayParamPoints = []
-
-            intersections = phiPlane.findTwoIntersections(samplingRay)
+        rows = []
+        scanlines = []
 
+        for i, intersections in enumerate(samplingRays.findIntersections(phiPlane)):
             if intersections is None:
-                geomPoints.append(rayGeomPoints)
-                paramPoints.append(rayParamPoints)
                 continue
 
             inGeomPoint = intersections[0].geomPoint
             outGeomPoint = intersections[1].geomPoint
 
-            prevUV = intersections[0].paramPoint
+            # The inside index also handles rows leaving and reentering the
+            # geometry, which the intersection x-range does not
+            if insideIndex is not None:
+                inside = insideIndex.containsMany(xValues, np.ones(samplingsPerRay) * yValues[i])
+            else:
+                inside = (xValues >= inGeomPoint[0]) & (xValues <= outGeomPoint[0])
 
-            for j, x in enumerate(xValues):
-                if x < inGeomPoint[0] or x > outGeomPoint[0]:
-                    rayGeomPoints.append(None)
-                    rayParamPoints.append(None)
-                    continue
+            rows.append(i)
+            scanlines.append((yValues[i], inside, intersections[0].paramPoint))
 
-                samplePoint = np.array([x, yValues[i]])
+        voxelized = voxelizer.voxelizeScanlines(phiPlane, xValues, scanlines, tolerance, warmStart, pool,
+                                                counters=counters)
 
-                pApprox = phiPlane.inverseWithinTolerance(samplePoint, prevUV, tolerance)
-                gApprox = phiPlane.evaluate(pApprox[0], pApprox[1])
+        for i, (rowParamPoints, rowGeomPoints) in zip(rows, voxelized):
+            paramPoints[i] = rowParamPoints
+            geomPoints[i] = rowGeomPoints
 
-                rayGeomPoints.append(gApprox)
-                rayParamPoints.append(pApprox)
+        return np.asarray(paramPoints), np.asarray(geomPoints)
+        
+    def createInverseGrid(self, width, height, tolerance):
+        '''
+        Voxelizes the parameter points into an InverseGrid over the bounding
+        box and seeds the model's sampling inversions from it. Voxelization
+        only uses a grid when given one as warmStart
+        '''
+        bb = self.phiPlane.createBoundingBox()
 
-                prevUV = pApprox
+        paramPoints, geomPoints = self.approximateSamplePoints(bb, width, height, tolerance)
+        self.inverseGrid = InverseGrid(bb, paramPoints)
 
-            geomPoints.append(rayGeomPoints)
-            paramPoints.append(rayParamPoints)
+        return self.inverseGrid
 
-        return np.asarray(paramPoints), np.asarray(geomPoints)
-        
-    def generateScalarMatrix(self, boundingBox, width, height, tolerance, paramPlotter=None, geomPlotter=None):
+    def generateScalarMatrix(self, boundingBox, width, height, tolerance, paramPlotter=None, geomPlotter=None,
+                             warmStart=None, pool=None, counters=None, insideIndex=None):
         bb = boundingBox
         
         samplingScalars = np.ones((height, width)) * SplineModel.samplingDefault
 
         samplingRays = self.createSamplingRays(bb, width, height)
 
-        paramPoints, geomPoints = self.approximateSamplePoints(bb, width, height, tolerance)
+        paramPoints, geomPoints = self.approximateSamplePoints(bb, width, height, tolerance, warmStart, pool, counters,
+                                                            insideIndex)
+        residents = [(i, j, paramPoint) for i, rayParamPoints in enumerate(paramPoints)
+                     for j, paramPoint in enumerate(rayParamPoints) if paramPoint is not None]
+
+        # Nothing resident leaves nothing to warm start from
+        self.voxelizationGrid = InverseGrid(bb, paramPoints) if len(residents) > 0 else None
 
-        for i, rayParamPoints in enumerate(paramPoints):
-            for j, paramPoint in enumerate(rayParamPoints):
-                if paramPoint is not None:
-                    scalar = self.rho.evaluate(paramPoint[0], paramPoint[1])
-                    samplingScalars[i][j] = scalar
+        if len(residents) > 0:
+            (rows, cols, residentParamPoints) = zip(*residents)
+            residentParamPoints = np.asarray(residentParamPoints)
+            scalars = self.rho.evaluateMany(residentParamPoints[:, 0], residentParamPoints[:, 1])[:, 0]
+            samplingScalars[np.array(rows), np.array(cols)] = scalars
         
         if paramPlotter is not None:
             for rayParamPoints in paramPoints:
@@ -120,6 +208,68 @@ class SplineModel(BaseModel):
 
         return samplingScalars
 
+    def generateScalarTile(self, boundingBox, width, height, tolerance, rowRange, colRange, insideIndex,
+                           warmStart=None):
+        '''
+        Voxelizes rows [rowRange[0], rowRange[1]) and columns [colRange[0],
+        colRange[1]) of the matrix generateScalarMatrix gives, to within
+        tolerance. Texels are tested with insideIndex (an InsideIndex), and
+        each row is seeded from the first inside texel of the row below. The
+        first row starts from warmStart's seed (an InverseGrid), if given
+        '''
+        phiPlane = self.phiPlane
+        bb = boundingBox
+
+        xDelta = float(bb.getWidth())/width
+        yDelta = float(bb.getHeight())/height
+
+        xValues = np.linspace(bb.left+xDelta/2, bb.right-xDelta/2, width)[colRange[0]:colRange[1]]
+        yValues = np.linspace(bb.bottom+yDelta/2, bb.top-yDelta/2, height)[rowRange[0]:rowRange[1]]
+
+        interval = phiPlane.interval
+        mid = (interval[0] + interval[1]) / 2.0
+
+        samplingScalars = np.ones((len(yValues), len(xValues))) * SplineModel.samplingDefault
+        residents = []
+        rowUV = None
+
+        for i, y in enumerate(yValues):
+            inside = insideIndex.containsMany(xValues, np.ones(len(xValues)) * y)
+            prevUV = rowUV
+            firstUV = None
+
+            for j in np.flatnonzero(inside):
+                samplePoint = np.array([xValues[j], y])
+
+                if prevUV is None:
+                    prevUV = [mid, mid] if warmStart is None else warmStart.seed(samplePoint)
+
+                    if prevUV is None:
+                        prevUV = [mid, mid]
+
+                pApprox = phiPlane.inverseWithinTolerance(samplePoint, prevUV, tolerance)
+
+                if pApprox is None:
+                    continue
+
+                residents.append((i, j, pApprox))
+
+                if firstUV is None:
+                    firstUV = pApprox
+
+                prevUV = pApprox
+
+            if firstUV is not None:
+                rowUV = firstUV
+
+        if len(residents) > 0:
+            (rows, cols, paramPoints) = zip(*residents)
+            paramPoints = np.asarray(paramPoints)
+            samplingScalars[np.array(rows), np.array(cols)] = self.rho.evaluateMany(paramPoints[:, 0],
+                                                                                    paramPoints[:, 1])[:, 0]
+
+        return samplingScalars
+
     def sampleInFrustum(self, samplePoint, pGuess, frustum):
         phiPlane = self.phiPlane
         rho = self.rho
@@ -144,31 +294,174 @@ class SplineModel(BaseModel):
         
         return [color, pApprox, gApprox]
 
-    def sample(self, samplePoint, prevSample, viewRay, delta):
+    def __inverse(self, samplePoint, pGuess, viewRay, delta, context):
         phiPlane = self.phiPlane
-        rho = self.rho
-        
-        pGuess = prevSample.paramPoint
-        
+
         if self.samplingTolerance is None:
-            frustum = viewRay.frustumBoundingEllipse(samplePoint, delta)
-            pApprox = phiPlane.inverseInFrustum(samplePoint, pGuess, frustum)
-        else:
-            pApprox = phiPlane.inverseWithinTolerance(samplePoint, pGuess, self.samplingTolerance)
+            frustum = viewRay.frustumBoundingEllipseParams(samplePoint, delta)
+            seed = self.__frustumSeed(samplePoint, pGuess)
+
+            if seed is not None:
+                # The grid's seed is only as close as its cells, so it is
+                # stepped from even if already within the frustum
+                return phiPlane.inverseInFrustum(samplePoint, seed, frustum, context.counters, acceptGuess=False)
+
+            return phiPlane.inverseInFrustum(samplePoint, pGuess, frustum, context.counters)
+
+        pGuess = self.__seed(samplePoint, pGuess)
+
+        return phiPlane.inverseWithinTolerance(samplePoint, pGuess, self.samplingTolerance, context.counters)
+
+    def __sample(self, samplePoint, pGuess, viewRay, delta, context):
+        phiPlane = self.phiPlane
+        rho = self.rho
 
+        pApprox = self.__inverse(samplePoint, pGuess, viewRay, delta, context)
         gApprox = phiPlane.evaluate(pApprox[0], pApprox[1])
         scalar = rho.evaluate(pApprox[0], pApprox[1])[0]
 
         return SplineSample(gApprox, scalar, pApprox)
+
+    def __seed(self, samplePoint, pGuess):
+        '''Returns the inverse grid's guess for samplePoint, or pGuess if there is none'''
+        if self.inverseGrid is None:
+            return pGuess
+
+        seed = self.inverseGrid.seed(samplePoint)
+
+        return pGuess if seed is None else seed
+
+    def __frustumSeed(self, samplePoint, pGuess):
+        '''
+        Returns the inverse grid's guess for samplePoint if it lies closer to
+        samplePoint than pGuess does, otherwise None
+        '''
+        if self.inverseGrid is None:
+            return None
+
+        seed = self.inverseGrid.seed(samplePoint)
+
+        if seed is None:
+            return None
+
+        phiPlane = self.phiPlane
+        seedDistance = magnitude(phiPlane.evaluate(seed[0], seed[1]) - samplePoint)
+        guessDistance = magnitude(phiPlane.evaluate(pGuess[0], pGuess[1]) - samplePoint)
+
+        return seed if seedDistance < guessDistance else None
+
+    def __isOutside(self, samplePoint):
+        '''Whether the inverse grid, if any, rejects samplePoint as outside the geometry'''
+        return self.inverseGrid is not None and self.inverseGrid.isOutside(samplePoint)
+
+    def __paramGuess(self, prevSample, samplePoint):
+        if isinstance(prevSample, SplineSample):
+            return prevSample.paramPoint
+
+        # Entering from another model, start from the inverse grid's guess or
+        # the middle of the parameter domain
+        interval = self.phiPlane.interval
+        mid = (interval[0] + interval[1]) / 2.0
+
+        return self.__seed(samplePoint, [mid, mid])
+
+    def __cachedSample(self, samplePoint, prevSample, viewRay, delta, context):
+        '''
+        Samples with the previous ray's parameters at the same depth as the
+        guess when prevSample has none to offer, and caches the result
+        '''
+        cache = self.paramCache
+        cache.begin(viewRay)
+
+        if self.__isOutside(samplePoint):
+            return None
+
+        depth = cache.depth(viewRay, samplePoint)
+
+        if isinstance(prevSample, SplineSample):
+            pGuess = prevSample.paramPoint
+        else:
+            pGuess = cache.guess(depth, delta)
+
+            if pGuess is None:
+                pGuess = self.__paramGuess(prevSample, samplePoint)
+
+        sample = self.__sample(samplePoint, pGuess, viewRay, delta, context)
+        cache.add(depth, sample.paramPoint)
+
+        return sample
+
+    def sample(self, samplePoint, prevSample, viewRay, delta, context):
+        if self.crossRayGuesses:
+            return self.__cachedSample(samplePoint, prevSample, viewRay, delta, context)
+
+        if self.__isOutside(samplePoint):
+            return None
+
+        return self.__sample(samplePoint, self.__paramGuess(prevSample, samplePoint), viewRay, delta, context)
+
+    def sampleSegment(self, samplePoints, prevSample, viewRay, delta, context):
+        if self.crossRayGuesses:
+            sample = prevSample
+
+            for samplePoint in samplePoints:
+                sample = self.__cachedSample(samplePoint, sample, viewRay, delta, context)
+
+                yield samplePoint, sample
+
+            return
+
+        if len(samplePoints) == 0:
+            return
+
+        phiPlane = self.phiPlane
+        pGuess = self.__paramGuess(prevSample, samplePoints[0])
+        blockSize = SplineModel.sampleBlockSize
+
+        # Inverts a block of sample points at a time and evaluates rho over
+        # the block at once. Early ray termination then wastes at most the
+        # rest of a block
+        for begin in range(0, len(samplePoints), blockSize):
+            blockSamplePoints = samplePoints[begin:begin+blockSize]
+            paramPoints = []
+
+            # None for points the inverse grid rejects or the inversion fails for
+            for samplePoint in blockSamplePoints:
+                pApprox = None
+
+                if not self.__isOutside(samplePoint):
+                    pApprox = self.__inverse(samplePoint, pGuess, viewRay, delta, context)
+
+                if pApprox is not None:
+                    pGuess = pApprox
+
+                paramPoints.append(pApprox)
+
+            insideParams = np.asarray([pApprox for pApprox in paramPoints if pApprox is not None])
+            scalars = iter([])
+
+            if len(insideParams) > 0:
+                scalars = iter(self.rho.evaluateMany(insideParams[:, 0], insideParams[:, 1])[:, 0])
+
+            for samplePoint, pApprox in zip(blockSamplePoints, paramPoints):
+                if pApprox is None:
+                    yield samplePoint, None
+                else:
+                    gApprox = phiPlane.evaluate(pApprox[0], pApprox[1])
+
+                    yield samplePoint, SplineSample(gApprox, next(scalars), pApprox)
     
-    def inSample(self, intersection, viewRay):
+    def inSample(self, intersection, viewRay, context):
         pApprox = intersection.paramPoint
         scalar = self.rho.evaluate(pApprox[0], pApprox[1])[0]
         
         return SplineSample(intersection.geomPoint, scalar, pApprox)
     
-    def outSample(self, intersection, viewRay):
-        return self.inSample(intersection, viewRay)
+    def outSample(self, intersection, viewRay, context):
+        return self.inSample(intersection, viewRay, context)
+
+    def findIntersections(self, viewRay, context):
+        intersections = self.phiPlane.findTwoIntersections(viewRay, context.seedIntersections, context.counters)
+        context.splineIntersections = intersections
 
-    def findIntersections(self, viewRay):
-        return self.phiPlane.findTwoIntersections(viewRay)
+        return intersections
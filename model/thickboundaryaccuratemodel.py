@@ -1,3 +1,4 @@
+from model.basemodel import BaseModel
 from model.boundaryaccuratemodel import BoundaryAccurateModel
 
 
@@ -5,10 +6,16 @@ class ThickBoundaryAccurateModel(BoundaryAccurateModel):
     def __init__(self, transfer, splineModel, voxelModel):
         super(ThickBoundaryAccurateModel, self).__init__(transfer, splineModel, voxelModel)
 
-    def sample(self, samplePoint, prevSample, viewRay, delta):
-        voxelSample = self.voxelModel.sample(samplePoint, prevSample, viewRay, delta)
+    def sample(self, samplePoint, prevSample, viewRay, delta, context):
+        voxelSample = self.voxelModel.sample(samplePoint, prevSample, viewRay, delta, context)
 
         if voxelSample is not None:
             return voxelSample
         else:
-            return self.splineModel.sample(samplePoint, prevSample, viewRay, delta)
+            return self.splineModel.sample(samplePoint, prevSample, viewRay, delta, context)
+
+    def samplePointsBetween(self, inGeomPoint, outGeomPoint, viewDirDelta):
+        return BaseModel.samplePointsBetween(self, inGeomPoint, outGeomPoint, viewDirDelta)
+
+    def sampleSegment(self, samplePoints, prevSample, viewRay, delta, context):
+        return BaseModel.sampleSegment(self, samplePoints, prevSample, viewRay, delta, context)
@@ -24,6 +24,12 @@ class VoxelLodModel(BaseModel):
             self.voxelDiagonals.append(sqrt2 * voxelWidth)
             self.lodModels.append(VoxelModel(transfer, texture, boundingBox))
 
+        # Bounding box intersections of the rays being rendered, by ray
+        self.rayIntersections = {}
+
+    def beginRender(self, viewRays):
+        self.rayIntersections = dict(zip(viewRays, self.boundingBox.findTwoIntersectionsMany(viewRays)))
+
     def __chooseLodLevel(self, samplePoint, viewRay):
         z = samplePoint[0] - viewRay.eye[0]
         pixelFrustumWidth = self.pixelWidth * z / viewRay.near
@@ -38,10 +44,10 @@ class VoxelLodModel(BaseModel):
 
         return index
 
-    def sample(self, samplePoint, prevSample, viewRay, delta):
+    def sample(self, samplePoint, prevSample, viewRay, delta, context):
         lodLevel = self.__chooseLodLevel(samplePoint, viewRay)
         model = self.lodModels[lodLevel]
-        sample = model.sample(samplePoint, prevSample, viewRay, delta)
+        sample = model.sample(samplePoint, prevSample, viewRay, delta, context)
 
         if sample is None:
             return None
@@ -49,10 +55,10 @@ class VoxelLodModel(BaseModel):
             sample.type = SamplingType.VOXEL_MODEL_LOD[lodLevel]
             return sample
 
-    def inSample(self, intersection, viewRay):
+    def inSample(self, intersection, viewRay, context):
         lodLevel = self.__chooseLodLevel(intersection.geomPoint, viewRay)
         model = self.lodModels[lodLevel]
-        sample = model.inSample(intersection, viewRay)
+        sample = model.inSample(intersection, viewRay, context)
 
         if sample is None:
             return None
@@ -60,10 +66,10 @@ class VoxelLodModel(BaseModel):
             sample.type = SamplingType.VOXEL_MODEL_LOD[lodLevel]
             return sample
 
-    def outSample(self, intersection, viewRay):
+    def outSample(self, intersection, viewRay, context):
         lodLevel = self.__chooseLodLevel(intersection.geomPoint, viewRay)
         model = self.lodModels[lodLevel]
-        sample = model.outSample(intersection, viewRay)
+        sample = model.outSample(intersection, viewRay, context)
 
         if sample is None:
             return None
@@ -71,5 +77,8 @@ class VoxelLodModel(BaseModel):
             sample.type = SamplingType.VOXEL_MODEL_LOD[lodLevel]
             return sample
 
-    def findIntersections(self, viewRay):
+    def findIntersections(self, viewRay, context):
+        if viewRay in self.rayIntersections:
+            return self.rayIntersections[viewRay]
+
         return self.boundingBox.findTwoIntersections(viewRay)
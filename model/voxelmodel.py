@@ -1,6 +1,9 @@
+import itertools
 import numpy as np
 
-from model.basemodel import BaseModel, Sample
+import instrumentation
+from emptyspace import EmptySpaceGrid
+from model.basemodel import BaseModel, Sample, SamplePoints
 from samplingtype import SamplingType
 
 
@@ -12,15 +15,32 @@ class VoxelModel(BaseModel):
         
         self.boundingBox = boundingBox
         self.scalarTexture = scalarTexture
+
+        # EmptySpaceGrid letting sampleSegment skip empty and transparent cells, if set
+        self.emptySpace = None
+
+        # Bounding box intersections of the rays being rendered, by ray
+        self.rayIntersections = {}
+
+    def beginRender(self, viewRays):
+        # One slab test for the whole batch instead of one per ray
+        self.rayIntersections = dict(zip(viewRays, self.boundingBox.findTwoIntersectionsMany(viewRays)))
+
+    def createEmptySpaceGrid(self, cellSize=4):
+        self.emptySpace = EmptySpaceGrid(self.scalarTexture, self.transfer, cellSize)
+
+        return self.emptySpace
     
-    def sample(self, samplePoint, prevSample, viewRay, delta):
+    def sample(self, samplePoint, prevSample, viewRay, delta, context):
         bb = self.boundingBox
         texture = self.scalarTexture
 
         u = (samplePoint[0]-bb.left)/bb.getWidth()
         v = (samplePoint[1]-bb.bottom)/bb.getHeight()
         
+        start = instrumentation.clock(context.counters)
         scalar = texture.fetch([u, v])
+        instrumentation.addTime(context.counters, instrumentation.FETCH, start)
 
         if scalar == -1:
             return None
@@ -29,11 +49,51 @@ class VoxelModel(BaseModel):
 
         return Sample(geomPoint, scalar, SamplingType.VOXEL_MODEL_LOD[0])
     
-    def inSample(self, intersection, viewRay):
-        return self.sample(intersection.geomPoint, None, viewRay, None)
+    def samplePointsBetween(self, inGeomPoint, outGeomPoint, viewDirDelta):
+        # Only the points sampleSegment keeps are ever computed
+        return SamplePoints(inGeomPoint, outGeomPoint, viewDirDelta)
+
+    def sampleSegment(self, samplePoints, prevSample, viewRay, delta, context):
+        count = len(samplePoints)
+
+        if count == 0:
+            return
+
+        bb = self.boundingBox
+        sampleType = SamplingType.VOXEL_MODEL_LOD[0]
+        ranges = [(0, count)]
+
+        if self.emptySpace is not None:
+            first = samplePoints[0]
+            step = viewRay.viewDir * delta
+            ranges = self.emptySpace.keepRanges((first[0]-bb.left)/bb.getWidth(), (first[1]-bb.bottom)/bb.getHeight(),
+                                                step[0]/bb.getWidth(), step[1]/bb.getHeight(), count)
+
+            if len(ranges) == 0:
+                return
+
+        points = np.concatenate([np.asarray(samplePoints[begin:end]).reshape((-1, 2)) for begin, end in ranges])
+        us = (points[:, 0]-bb.left)/bb.getWidth()
+        vs = (points[:, 1]-bb.bottom)/bb.getHeight()
+
+        start = instrumentation.clock(context.counters)
+        scalars = self.scalarTexture.fetchMany(us, vs)
+        instrumentation.addTime(context.counters, instrumentation.FETCH, start)
+
+        for samplePoint, scalar in itertools.izip(points, scalars):
+            if scalar == -1:
+                yield samplePoint, None
+            else:
+                yield samplePoint, Sample(np.array(samplePoint), scalar, sampleType)
+    
+    def inSample(self, intersection, viewRay, context):
+        return self.sample(intersection.geomPoint, None, viewRay, None, context)
     
-    def outSample(self, intersection, viewRay):
-        return self.inSample(intersection, viewRay)
+    def outSample(self, intersection, viewRay, context):
+        return self.inSample(intersection, viewRay, context)
+
+    def findIntersections(self, viewRay, context):
+        if viewRay in self.rayIntersections:
+            return self.rayIntersections[viewRay]
 
-    def findIntersections(self, viewRay):
         return self.boundingBox.findTwoIntersections(viewRay)
@@ -2,13 +2,28 @@ import math
 import numpy as np
 import scipy.linalg as linalg
 
-def newtonsMethod1D(f, df, x, tolerance):
+class Counters(object):
+	'''
+	Iterations and failures of the solvers given it as counters. Failures only
+	count inversions, since missing a boundary is expected when intersecting
+	'''
+	def __init__(self):
+		self.newtonIterations = 0
+		self.newtonFailures = 0
+
+	def add(self, other):
+		self.newtonIterations += other.newtonIterations
+		self.newtonFailures += other.newtonFailures
+
+def newtonsMethod1D(f, df, x, tolerance, counters=None):
 	'''
 	f is the function f(x) and df its derivative
 	x is the first guess
 	'''
-
 	while True:
+		if counters is not None:
+			counters.newtonIterations += 1
+
 		x1 = x - f(x)/float(df(x))
 		t = abs(x1 - x)
 
@@ -26,7 +41,7 @@ def clampToInterval(value, interval):
 	
 	return value
 
-def newtonsMethod2DTolerance(phi, uvInitialGuess, xyTarget, uvIntervals, tolerance, maxAttempts=20):
+def newtonsMethod2DTolerance(phi, uvInitialGuess, xyTarget, uvIntervals, tolerance, maxAttempts=20, counters=None):
 	attempt = 1
 	u = uvInitialGuess[0]
 	v = uvInitialGuess[1]
@@ -45,6 +60,9 @@ def newtonsMethod2DTolerance(phi, uvInitialGuess, xyTarget, uvIntervals, toleran
 			
 			return [u, v]
 		
+		if counters is not None:
+			counters.newtonIterations += 1
+
 		jacob = phi.jacob(u, v) 
 		
 		x = linalg.solve(jacob, -f(u, v))
@@ -58,14 +76,18 @@ def newtonsMethod2DTolerance(phi, uvInitialGuess, xyTarget, uvIntervals, toleran
 		attempt += 1
 		
 	if attempt == maxAttempts:
+		if counters is not None:
+			counters.newtonFailures += 1
+
 		return None
 		
 	return [u, v]
 
-def newtonsMethod2DIntersect(boundaryPhi, boundaryPhiJacob, ray, uInitialGuess, uInterval, tolerance, maxAttempts=20):
+def newtonsMethod2DIntersect(boundaryPhi, boundaryPhiJacob, ray, uInitialGuess, uInterval, tolerance, maxAttempts=20, vInitialGuess=0.0,
+							 counters=None):
 	attempt = 1
 	u = uInitialGuess
-	v = 0.0
+	v = vInitialGuess
 	
 	def f(u, v):
 		return boundaryPhi(u) - ray.eval(v)
@@ -79,6 +101,9 @@ def newtonsMethod2DIntersect(boundaryPhi, boundaryPhiJacob, ray, uInitialGuess,
 		if math.sqrt(result[0]**2 + result[1]**2) < tolerance:
 			return [u, v]
 
+		if counters is not None:
+			counters.newtonIterations += 1
+
 		jacob = fJacob(u, v)
 		
 		if abs(linalg.det(jacob)) < 1e-6:
@@ -96,7 +121,12 @@ def newtonsMethod2DIntersect(boundaryPhi, boundaryPhiJacob, ray, uInitialGuess,
 		
 	return [u, v]
 
-def newtonsMethod2DFrustum(f, fJacob, uv, clampInterval, phi, frustum, maxAttempts=20):
+def newtonsMethod2DFrustum(f, fJacob, uv, clampInterval, phi, frustum, maxAttempts=20, counters=None, acceptGuess=True):
+	'''
+	frustum is the bounding ellipse as given by Ray2D.frustumBoundingEllipseParams.
+	Without acceptGuess, at least one step is taken from uv
+	'''
+	(x0, y0, cosAngle, sinAngle, halfWidthSq, halfHeightSq) = frustum
 	attempt = 1
 	u = clampToInterval(uv[0], clampInterval)
 	v = clampToInterval(uv[1], clampInterval)
@@ -104,9 +134,16 @@ def newtonsMethod2DFrustum(f, fJacob, uv, clampInterval, phi, frustum, maxAttemp
 	while attempt < maxAttempts:
 		gApprox = phi.evaluate(u, v)
 		
-		if frustum.enclosesPoint(gApprox):
+		dx = gApprox[0] - x0
+		dy = gApprox[1] - y0
+		
+		if (attempt > 1 or acceptGuess) and \
+				(cosAngle*dx + sinAngle*dy)**2/halfWidthSq + (sinAngle*dx - cosAngle*dy)**2/halfHeightSq <= 1.0:
 			return [u, v]
 		
+		if counters is not None:
+			counters.newtonIterations += 1
+
 		jacob = fJacob(u, v)
 		
 		x = linalg.solve(jacob, -f(u, v))
@@ -118,6 +155,9 @@ def newtonsMethod2DFrustum(f, fJacob, uv, clampInterval, phi, frustum, maxAttemp
 		attempt += 1
 		
 	if attempt == maxAttempts:
+		if counters is not None:
+			counters.newtonFailures += 1
+
 		return None
 		
 	return [u, v]
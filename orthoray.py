@@ -0,0 +1,53 @@
+import numpy as np
+
+from ray import normalize2D
+from raybatch import RayBatch
+
+
+class OrthoRay2D(object):
+    '''
+    A sampling ray of an OrthoRayBundle. It has the parts of Ray2D used for
+    intersecting and plotting, but no frustum, and shares its direction with
+    the rest of the bundle
+    '''
+    __slots__ = ('eye', 'pixel', 'viewDir', 'maxRange', 'pixelWidth')
+
+    def __init__(self, eye, pixel, viewDir, maxRange):
+        self.eye = eye
+        self.pixel = pixel
+        self.viewDir = viewDir
+        self.maxRange = maxRange
+        self.pixelWidth = 0
+
+    def eval(self, t):
+        return self.pixel + self.viewDir*t
+
+    def evalFromEye(self, t):
+        return self.eye + self.viewDir*t
+
+    def evalFromPixel(self, t):
+        return self.pixel + self.viewDir*t
+
+    def deval(self, t):
+        return self.viewDir
+
+    def inRange(self, t):
+        return 0 <= t <= self.maxRange
+
+
+class OrthoRayBundle(RayBatch):
+    '''
+    Parallel sampling rays through pixels, with each eye eyeDistance behind its
+    pixel. Indexing and iterating gives the rays, which have no frustum
+    '''
+    def __init__(self, pixels, viewDir, eyeDistance, maxRange=10):
+        self.viewDir = normalize2D(viewDir)
+        pixels = np.asarray(pixels, dtype=float).reshape((-1, 2))
+
+        super(OrthoRayBundle, self).__init__(pixels - self.viewDir*eyeDistance, pixels, 0.0, maxRange)
+
+        # Normalizing pixels - eyes can round away from viewDir, which the
+        # rays use, so the batch's slab tests could disagree with theirs
+        self.viewDirs = np.tile(self.viewDir, (len(pixels), 1))
+
+        self.rays = [OrthoRay2D(eye, pixel, self.viewDir, maxRange) for eye, pixel in zip(self.eyes, self.pixels)]
@@ -0,0 +1,149 @@
+import collections
+import math
+import numpy as np
+
+import fileio.voxelio as voxelio
+
+
+class PagedTexture2D(object):
+    '''
+    A width x height voxel texture that is voxelized tileSize x tileSize
+    tiles at a time, on first access. At most maxTiles tiles are kept, the
+    least recently used being evicted first. Given a dataset, tiles are
+    written to disk when voxelized and read back instead of being voxelized
+    again.
+
+    Fetches give what texture.Texture2D gives for the full scalar matrix,
+    up to the Newton tolerance the tiles are voxelized with
+    '''
+    def __init__(self, splineModel, boundingBox, width, height, tolerance, tileSize=32, maxTiles=64, dataset=None):
+        self.splineModel = splineModel
+        self.boundingBox = boundingBox
+        self.cols = width
+        self.rows = height
+        self.tolerance = tolerance
+        self.tileSize = tileSize
+        self.maxTiles = maxTiles
+        self.dataset = dataset
+
+        self.tileRows = int(math.ceil(height / float(tileSize)))
+        self.tileCols = int(math.ceil(width / float(tileSize)))
+
+        self.tiles = collections.OrderedDict()
+        self.insideIndex = splineModel.phiPlane.createInsideIndex()
+
+        self.tilesVoxelized = 0
+        self.tilesRead = 0
+        self.tilesEvicted = 0
+
+    def __createTile(self, tileRow, tileCol):
+        size = self.tileSize
+        dataset = self.dataset
+        tolerance = self.tolerance
+
+        if dataset is not None and voxelio.tileExist(dataset, self.cols, self.rows, tolerance, size, tileRow, tileCol):
+            self.tilesRead += 1
+            return voxelio.readTile(dataset, self.cols, self.rows, tolerance, size, tileRow, tileCol)
+
+        rowRange = [tileRow*size, min((tileRow+1)*size, self.rows)]
+        colRange = [tileCol*size, min((tileCol+1)*size, self.cols)]
+
+        tile = self.splineModel.generateScalarTile(self.boundingBox, self.cols, self.rows, tolerance,
+                                                   rowRange, colRange, self.insideIndex)
+        self.tilesVoxelized += 1
+
+        if dataset is not None:
+            voxelio.writeTile(dataset, self.cols, self.rows, tolerance, size, tileRow, tileCol, tile)
+
+        return tile
+
+    def tile(self, tileRow, tileCol):
+        key = (tileRow, tileCol)
+        tiles = self.tiles
+
+        if key in tiles:
+            tile = tiles.pop(key)
+        else:
+            tile = self.__createTile(tileRow, tileCol)
+
+            if len(tiles) >= self.maxTiles:
+                tiles.popitem(last=False)
+                self.tilesEvicted += 1
+
+        tiles[key] = tile
+
+        return tile
+
+    def texels(self, rowIndices, colIndices):
+        '''Texel values at arrays of indices, clamped to the texture like its ghost cells'''
+        rowIndices = np.clip(rowIndices, 0, self.rows - 1)
+        colIndices = np.clip(colIndices, 0, self.cols - 1)
+
+        size = self.tileSize
+        tileRows = rowIndices / size
+        tileCols = colIndices / size
+
+        result = np.empty(len(rowIndices))
+
+        for tileRow, tileCol in set(zip(tileRows, tileCols)):
+            inTile = (tileRows == tileRow) & (tileCols == tileCol)
+            tile = self.tile(tileRow, tileCol)
+            result[inTile] = tile[rowIndices[inTile] - tileRow*size, colIndices[inTile] - tileCol*size]
+
+        return result
+
+    @staticmethod
+    def __bilinear(corners, fx, fy):
+        (lowerLeft, lowerRight, upperLeft, upperRight) = corners
+
+        return ((1.0 - fy) * ((1.0 - fx) * lowerLeft + fx * lowerRight) +
+                fy * ((1.0 - fx) * upperLeft + fx * upperRight))
+
+    def fetchMany(self, us, vs):
+        cols = self.cols
+        rows = self.rows
+        us = np.asarray(us, dtype=float)
+        vs = np.asarray(vs, dtype=float)
+
+        # Ghost cell padded grid, as in bilinear.interpolate
+        marginX = 1.0/(2.0 * cols)
+        marginY = 1.0/(2.0 * rows)
+
+        (xRange, yRange) = ([-marginX, 1.0+marginX], [-marginY, 1.0+marginY])
+        x = (np.clip(us, xRange[0], xRange[1]) - xRange[0]) / (xRange[1] - xRange[0]) * (cols + 1)
+        y = (np.clip(vs, yRange[0], yRange[1]) - yRange[0]) / (yRange[1] - yRange[0]) * (rows + 1)
+
+        i = np.minimum(np.floor(x).astype(int), cols)
+        j = np.minimum(np.floor(y).astype(int), rows)
+
+        # Indicators live on the unpadded grid
+        (xRange, yRange) = ([marginX, 1.0-marginX], [marginY, 1.0-marginY])
+        xi = (np.clip(us, xRange[0], xRange[1]) - xRange[0]) / (xRange[1] - xRange[0]) * (cols - 1)
+        yi = (np.clip(vs, yRange[0], yRange[1]) - yRange[0]) / (yRange[1] - yRange[0]) * (rows - 1)
+
+        ii = np.minimum(np.floor(xi).astype(int), cols - 2)
+        ji = np.minimum(np.floor(yi).astype(int), rows - 2)
+
+        # All texels are gathered in one go, so no tile is evicted between
+        # the corners, the indicators and the closest texels that need it.
+        # The corners' padded index k holds texel k-1
+        count = len(us)
+        rowIndices = np.concatenate((j-1, j-1, j, j, ji, ji, ji+1, ji+1, np.floor(vs * rows).astype(int)))
+        colIndices = np.concatenate((i-1, i, i-1, i, ii, ii+1, ii, ii+1, np.floor(us * cols).astype(int)))
+        texels = self.texels(rowIndices, colIndices)
+
+        corners = texels[:4*count].reshape((4, count))
+        indicators = (texels[4*count:8*count] == -1).astype(float).reshape((4, count))
+        closest = texels[8*count:]
+
+        scalars = self.__bilinear(corners, x - i, y - j)
+
+        nonresident = self.__bilinear(indicators, xi - ii, yi - ji) > 0.0
+        nonresident |= closest == -1
+
+        scalars[nonresident] = -1
+
+        return scalars
+
+    def fetch(self, uv):
+        return self.fetchMany([uv[0]], [uv[1]])[0]
@@ -1,5 +1,6 @@
 import numpy as np
 import pylab as plt
+from matplotlib import cm
 from matplotlib.patches import Rectangle
 
 class PixelPlotter():
@@ -50,3 +51,15 @@ class PixelPlotter():
             colors[i] = np.array([ratio, ratio, ratio])
         
         self.plotPixelColors(colors)
+
+    def plotHeatMap(self, values, maxValue=None, colormap=cm.hot):
+        '''Plots per-pixel values, e.g. render costs, scaled to [0, maxValue]'''
+        values = np.asarray(values, dtype=float)
+
+        if maxValue is None:
+            maxValue = values.max()
+
+        if maxValue > 0.0:
+            values = values / maxValue
+
+        self.plotPixelColors(colormap(values)[:, :3])
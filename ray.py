@@ -7,7 +7,9 @@ def normalize2D(vector):
     magnitude = float(math.sqrt(vector[0]**2 + vector[1]**2))
     return np.array([vector[0] / magnitude, vector[1] / magnitude])
 
-class Ray2D:
+class Ray2D(object):
+    __slots__ = ('eye', 'pixel', 'pixelWidth', 'maxRange', 'near', 'viewDir', '__frustum')
+
     def __init__(self, eye, pixel, maxRange, pixelWidth):
         self.eye = eye
         self.pixel = pixel
@@ -16,11 +18,49 @@ class Ray2D:
         self.near = pixel[0] - eye[0]
         
         self.viewDir = normalize2D(pixel - eye)
-        
-        self.pixelTop = np.array([pixel[0], pixel[1] + pixelWidth/2])
-        self.pixelBottom = np.array([pixel[0], pixel[1] - pixelWidth/2])
-        self.frustumUpperDir = normalize2D(self.pixelTop - eye)
-        self.frustumLowerDir = normalize2D(self.pixelBottom - eye)
+
+        # Frustum geometry is constant along the ray, but only computed once
+        # something asks for it
+        self.__frustum = None
+
+    def __frustumAngleTan(self, frustumDir):
+        v = self.viewDir
+
+        cosAngle = np.dot(frustumDir, v) / la.norm(frustumDir) / la.norm(v)
+        angle = np.arccos(np.clip(cosAngle, -1, 1))
+
+        return np.tan(angle)
+
+    def __getFrustum(self):
+        if self.__frustum is None:
+            eye = self.eye
+            pixel = self.pixel
+            pixelWidth = self.pixelWidth
+
+            pixelTop = np.array([pixel[0], pixel[1] + pixelWidth/2])
+            pixelBottom = np.array([pixel[0], pixel[1] - pixelWidth/2])
+            frustumUpperDir = normalize2D(pixelTop - eye)
+            frustumLowerDir = normalize2D(pixelBottom - eye)
+
+            perpendicularViewDir = np.array([-self.viewDir[1], self.viewDir[0]])
+
+            rayAngle = math.atan(self.viewDir[1])
+
+            self.__frustum = (pixelTop, pixelBottom, frustumUpperDir, frustumLowerDir, perpendicularViewDir,
+                              math.cos(rayAngle), math.sin(rayAngle),
+                              self.__frustumAngleTan(frustumUpperDir), self.__frustumAngleTan(frustumLowerDir))
+
+        return self.__frustum
+
+    pixelTop = property(lambda self: self.__getFrustum()[0])
+    pixelBottom = property(lambda self: self.__getFrustum()[1])
+    frustumUpperDir = property(lambda self: self.__getFrustum()[2])
+    frustumLowerDir = property(lambda self: self.__getFrustum()[3])
+    perpendicularViewDir = property(lambda self: self.__getFrustum()[4])
+    cosRayAngle = property(lambda self: self.__getFrustum()[5])
+    sinRayAngle = property(lambda self: self.__getFrustum()[6])
+    frustumUpperTan = property(lambda self: self.__getFrustum()[7])
+    frustumLowerTan = property(lambda self: self.__getFrustum()[8])
 
     def eval(self, t):
         return self.evalFromPixel(t)
@@ -43,32 +83,27 @@ class Ray2D:
     def inRange(self, t):
         return 0 <= t <= self.maxRange
 
-    def frustumBoundingEllipse(self, point, delta):
-        upper = self.frustumUpperDir
-        lower = self.frustumLowerDir
-        v = self.viewDir
-        
-        rayAngle = math.atan(v[1])
-        
-        cosUpperAngle = np.dot(upper, v) / la.norm(upper) / la.norm(v)
-        upperAngle = np.arccos(np.clip(cosUpperAngle, -1, 1))
-        
-        cosLowerAngle = np.dot(lower, v) / la.norm(lower) / la.norm(v)
-        lowerAngle = np.arccos(np.clip(cosLowerAngle, -1, 1))
-        
-        eyeDistance = la.norm(point - self.eye)
-        upperDistance = np.tan(upperAngle)*eyeDistance
-        lowerDistance = np.tan(lowerAngle)*eyeDistance
-        
-        perpendicularViewDir = np.array([-self.viewDir[1], self.viewDir[0]])
-        
-        upperIntersectionPoint = point + perpendicularViewDir * upperDistance
-        lowerIntersectionPoint = point - perpendicularViewDir * lowerDistance
-        
-        midpoint = (upperIntersectionPoint + lowerIntersectionPoint) / 2.0
-        
-        return Ellipse(midpoint, delta, upperDistance + lowerDistance, rayAngle)
-    
+    def frustumBoundingEllipseParams(self, point, delta):
+        '''
+        Returns (x0, y0, cosAngle, sinAngle, halfWidthSq, halfHeightSq) describing
+        the ellipse bounding the frustum at point, without allocating an Ellipse
+        '''
+        eye = self.eye
+        frustum = self.__getFrustum()
+        perpendicular = frustum[4]
+
+        eyeDistance = math.sqrt((point[0]-eye[0])**2 + (point[1]-eye[1])**2)
+        upperDistance = frustum[7]*eyeDistance
+        lowerDistance = frustum[8]*eyeDistance
+
+        midpointOffset = (upperDistance - lowerDistance) / 2.0
+        x0 = point[0] + perpendicular[0]*midpointOffset
+        y0 = point[1] + perpendicular[1]*midpointOffset
+
+        halfHeight = (upperDistance + lowerDistance) / 2.0
+
+        return (x0, y0, frustum[5], frustum[6], (delta/2.)**2, halfHeight**2)
+
     def frustumBoundingEllipseParallel(self, point, delta):
         return Ellipse(point, delta, self.pixelWidth, 0)
         
@@ -0,0 +1,73 @@
+import numpy as np
+
+from ray import Ray2D
+
+
+def normalizeRows(vectors):
+    return vectors / np.sqrt(vectors[:, 0]**2 + vectors[:, 1]**2)[:, np.newaxis]
+
+
+class RayBatch(object):
+    '''
+    View rays as contiguous (N, 2) arrays of eyes, pixels, view directions
+    and frustum directions, with an (N,) array of pixel widths. The frustum
+    is spanned vertically across each pixel, as in Ray2D.
+
+    Indexing and iterating gives Ray2D objects for the per-ray code paths.
+    They are created on first access and kept, so what the models look up by
+    ray during a render, e.g. their intersections, stays with the batch
+    '''
+    def __init__(self, eyes, pixels, pixelWidths, maxRange=10):
+        self.pixels = np.asarray(pixels, dtype=float).reshape((-1, 2))
+
+        count = len(self.pixels)
+        self.eyes = np.ascontiguousarray(np.broadcast_to(np.asarray(eyes, dtype=float), (count, 2)))
+        self.pixelWidths = np.ascontiguousarray(np.broadcast_to(np.asarray(pixelWidths, dtype=float), (count,)))
+        self.maxRange = maxRange
+
+        self.viewDirs = normalizeRows(self.pixels - self.eyes)
+
+        halfWidths = np.column_stack((np.zeros(count), self.pixelWidths / 2))
+        self.frustumUpperDirs = normalizeRows(self.pixels + halfWidths - self.eyes)
+        self.frustumLowerDirs = normalizeRows(self.pixels - halfWidths - self.eyes)
+
+        self.rays = [None] * count
+
+    @staticmethod
+    def fromScreen(eye, screen, maxRange=10):
+        '''One ray per screen pixel, all from eye'''
+        return RayBatch(eye, screen.pixels, screen.pixelWidth, maxRange)
+
+    def __len__(self):
+        return len(self.rays)
+
+    def __getitem__(self, index):
+        ray = self.rays[index]
+
+        if ray is None:
+            ray = Ray2D(self.eyes[index], self.pixels[index], self.maxRange, float(self.pixelWidths[index]))
+            self.rays[index] = ray
+
+        return ray
+
+    def __iter__(self):
+        for i in xrange(len(self.rays)):
+            yield self[i]
+
+    def clip(self, boundingBox):
+        '''Returns arrays (tIn, tOut) from the slab test, see BoundingBox.clip'''
+        return boundingBox.clip(self)
+
+    def hits(self, boundingBox):
+        tIn, tOut = self.clip(boundingBox)
+
+        return tIn <= tOut
+
+    def findIntersections(self, phiPlane):
+        '''
+        Returns the intersections of each ray with phiPlane, or None for rays
+        that miss it. Rays missing its bounding box are not searched
+        '''
+        hits = self.hits(phiPlane.createBoundingBox())
+
+        return [phiPlane.findTwoIntersections(self[i]) if hit else None for i, hit in enumerate(hits)]
@@ -7,3 +7,4 @@ class RenderData:
         self.modelType = modelType
         self.renderResult = None
         self.texSize = texSize
+        self.renderTime = None
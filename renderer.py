@@ -1,12 +1,50 @@
 import numpy as np
+import time
 
-from ray import Ray2D
+import instrumentation
+from model.basemodel import RayContext
+from raybatch import RayBatch
+
+
+class PixelCosts(object):
+    '''
+    Per-pixel sample counts, Newton iterations and wall time of a render, the
+    iterations read off the render's counters
+    '''
+    def __init__(self, numPixels, counters):
+        self.samples = np.zeros(numPixels, dtype=int)
+        self.newtonIterations = np.zeros(numPixels, dtype=int)
+        self.times = np.zeros(numPixels)
+        self.counters = counters
+
+        self.startTime = 0.0
+        self.startIterations = 0
+
+    def begin(self):
+        self.startIterations = self.counters.newtonIterations
+        self.startTime = time.time()
+
+    def end(self, pixelIndex, samples):
+        self.times[pixelIndex] = time.time() - self.startTime
+        self.newtonIterations[pixelIndex] = self.counters.newtonIterations - self.startIterations
+        self.samples[pixelIndex] = samples
 
 
 class RenderingResult(object):
-    def __init__(self, colors, maxSamplePoints):
+    def __init__(self, colors, maxSamplePoints, totalSamplePoints=0):
         self.colors = colors
         self.maxSamplePoints = maxSamplePoints
+        self.totalSamplePoints = totalSamplePoints
+
+        # RenderCounters of the render, with phase times if instrumented
+        self.counters = None
+
+        # PixelCosts of a render with recordCosts set
+        self.costs = None
+
+        # Spline intersections found for each pixel, or None, for seeding
+        # a neighbouring render
+        self.splineIntersections = None
 
 
 class Renderer(object):
@@ -15,27 +53,85 @@ class Renderer(object):
         self.screen = screen
 
         self.plotViewRays = True
+        self.instrument = False
+        self.recordCosts = False
+
+        # Seed each ray's boundary intersections from the previous pixel's
+        self.coherentIntersections = False
 
         self.maxSamplePoints = 0
 
+    def createViewRays(self):
+        return RayBatch.fromScreen(self.eye, self.screen)
+
     def render(self, model, delta, plotter=None):
-        numPixels = self.screen.numPixels
-        pixels = self.screen.pixels
-        pixelWidth = self.screen.pixelWidth
+        return self.renderRays(model, delta, self.createViewRays(), plotter)
+
+    def createRayContexts(self, model, viewRays, counters):
+        '''The RayContext of each view ray, called once per batch'''
+        return [RayContext(counters) for viewRay in viewRays]
+
+    def createResult(self, colors, maxSamplePoints, totalSamplePoints, raycastResults):
+        '''The RenderingResult of a batch, given the RaycastResult of each ray'''
+        return RenderingResult(colors, maxSamplePoints, totalSamplePoints)
+
+    def renderRays(self, model, delta, viewRays, plotter=None, seedIntersections=None):
+        '''
+        Renders one pixel per view ray. Given seedIntersections, the spline
+        intersections of rays neighbouring viewRays one to one, e.g. those of
+        the previous row of an image, each ray's intersections are seeded from
+        its neighbour's
+        '''
+        numPixels = len(viewRays)
 
         colors = np.zeros((numPixels, 4))
         maxSamplePoints = 0
+        totalSamplePoints = 0
+
+        counters = instrumentation.RenderCounters(timed=self.instrument)
+        model.beginRender(viewRays)
+        contexts = self.createRayContexts(model, viewRays, counters)
+
+        costs = PixelCosts(numPixels, counters) if self.recordCosts else None
+
+        raycastResults = [None] * numPixels
+        splineIntersections = [None] * numPixels
+        previousIntersections = None
+
+        for i, viewRay in enumerate(viewRays):
+            if seedIntersections is not None:
+                seed = seedIntersections[i]
+            else:
+                seed = previousIntersections if self.coherentIntersections else None
 
-        for i, pixel, in enumerate(pixels):
-            viewRay = Ray2D(self.eye, pixel, 10, pixelWidth)
+            context = contexts[i]
+            context.seedIntersections = seed
 
             if plotter is not None and self.plotViewRays:
                 plotter.plotViewRay(viewRay, [0, 10])
 
-            result = model.raycast(viewRay, delta, plotter)
+            if costs is not None:
+                costs.begin()
+
+            result = model.raycast(viewRay, delta, plotter, context)
+            previousIntersections = context.splineIntersections
+            splineIntersections[i] = previousIntersections
+            raycastResults[i] = result
+
+            if costs is not None:
+                costs.end(i, result.samples)
+
+            instrumentation.countRay(counters, result.color is not None)
 
             if result.color is not None:
                 colors[i] = result.color
                 maxSamplePoints = max(result.samples, maxSamplePoints)
+                totalSamplePoints += result.samples
+
+        renderResult = self.createResult(colors, maxSamplePoints, totalSamplePoints, raycastResults)
+
+        renderResult.costs = costs
+        renderResult.counters = counters
+        renderResult.splineIntersections = splineIntersections
 
-        return RenderingResult(colors, maxSamplePoints)
+        return renderResult
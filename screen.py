@@ -16,14 +16,12 @@ class Screen:
         self.top = top
         self.numPixels = numPixels
 
-        pixels = np.empty((numPixels, 2))
         dir = normalize(top - bottom)
         length = magnitude(top - bottom)
         delta = length / numPixels
 
-        for i in range(numPixels):
-            pixels[i] = bottom + dir*(i*delta + delta/2)
+        offsets = np.arange(numPixels)*delta + delta/2
 
-        self.pixels = pixels
+        self.pixels = bottom + dir*offsets[:, np.newaxis]
         self.pixelWidth = delta
         self.viewDir = np.array([dir[1], -dir[0]])
@@ -1,7 +1,9 @@
 import numpy as np
 
+import instrumentation
 import newton
 from boundingbox import BoundingBox
+from insideindex import InsideIndex
 from intersection import Intersection
 from side import Side
 
@@ -39,7 +41,7 @@ class SplinePlane:
     def dright(self, v):
         return self.phi.evaluatePartialDerivativeV(self.interval[1], v)
 
-    def __findIntersection(self, side, ray, uGuess):
+    def __findIntersection(self, side, ray, uGuess, lineParamGuess=0.0, counters=None):
         if side == Side.BOTTOM:
             f = self.bottom
             df = self.dbottom
@@ -53,7 +55,8 @@ class SplinePlane:
             f = self.right
             df = self.dright
 
-        uv = newton.newtonsMethod2DIntersect(f, df, ray, uGuess, self.interval, self.tolerance)
+        uv = newton.newtonsMethod2DIntersect(f, df, ray, uGuess, self.interval, self.tolerance,
+                                             vInitialGuess=lineParamGuess, counters=counters)
         
         if uv is not None:
             interval = self.interval
@@ -67,22 +70,67 @@ class SplinePlane:
             else:
                 point = np.array([interval[1], uv[0]])
                 
-            return Intersection(point, ray.eval(uv[1]), uv[1])
+            return Intersection(point, ray.eval(uv[1]), uv[1], side)
         
         return None
-    
-    def findTwoIntersections(self, ray):
+
+    @staticmethod
+    def __boundaryParam(intersection):
+        side = intersection.side
+
+        if side == Side.BOTTOM or side == Side.TOP:
+            return intersection.paramPoint[0]
+        else:
+            return intersection.paramPoint[1]
+
+    def findTwoIntersectionsNear(self, ray, nearIntersections, counters=None):
+        '''
+        Searches only the sides of nearIntersections, e.g. those of a
+        neighbouring ray, starting from their parameters. Returns None if
+        either intersection is not found there
+        '''
+        result = []
+
+        for near in nearIntersections:
+            intersection = self.__findIntersection(near.side, ray, self.__boundaryParam(near), near.lineParam, counters)
+
+            if intersection is None or intersection.alreadyIn(result, self.tolerance):
+                return None
+
+            result.append(intersection)
+
+        if result[0].lineParam < result[1].lineParam:
+            return np.asarray(result)
+        else:
+            return np.asarray([result[1], result[0]])
+
+    def findTwoIntersections(self, ray, seedIntersections=None, counters=None):
+        '''
+        seedIntersections, e.g. those of a neighbouring ray, seed the search if
+        given, falling back to searching all sides from both ends
+        '''
+        result = None
+
+        if seedIntersections is not None:
+            result = self.findTwoIntersectionsNear(ray, seedIntersections, counters)
+
+        if result is None:
+            result = self.__searchTwoIntersections(ray, counters)
+
+        return result
+
+    def __searchTwoIntersections(self, ray, counters):
         result = []
 
         for side in Side.sides:
-            intersection = self.__findIntersection(side, ray, 0)
+            intersection = self.__findIntersection(side, ray, 0, counters=counters)
             
             if intersection is not None:
                 result.append(intersection)
                 
         if len(result) < 2:
             for side in Side.sides:
-                intersection = self.__findIntersection(side, ray, 1)
+                intersection = self.__findIntersection(side, ray, 1, counters=counters)
                 
                 if intersection is not None:
                     if not intersection.alreadyIn(result, self.tolerance):
@@ -106,18 +154,30 @@ class SplinePlane:
          
         return BoundingBox(left, right, bottom, top)
 
-    def inverseInFrustum(self, geomPoint, uvGuess, frustum):
+    def createInsideIndex(self, segmentsPerSide=64):
+        '''Returns an InsideIndex answering contains and containsMany for the geometry'''
+        return InsideIndex(self, segmentsPerSide, self.tolerance)
+
+    def inverseInFrustum(self, geomPoint, uvGuess, frustum, counters=None, acceptGuess=True):
         interval = self.interval
         phi = self.phi
         
         def f(u, v):
             return phi.evaluate(u, v) - geomPoint
-                              
-        return newton.newtonsMethod2DFrustum(f, phi.jacob, uvGuess, interval, phi, frustum)
 
-    def inverseWithinTolerance(self, geomPoint, uvGuess, tolerance):
-        phi = self.phi
+        start = instrumentation.clock(counters)
+        uv = newton.newtonsMethod2DFrustum(f, phi.jacob, uvGuess, interval, phi, frustum, counters=counters,
+                                           acceptGuess=acceptGuess)
+        instrumentation.addTime(counters, instrumentation.NEWTON, start)
+
+        return uv
 
+    def inverseWithinTolerance(self, geomPoint, uvGuess, tolerance, counters=None):
+        phi = self.phi
         uvIntervals = [self.interval, self.interval]
-                   
-        return newton.newtonsMethod2DTolerance(phi, uvGuess, geomPoint, uvIntervals, tolerance)
+
+        start = instrumentation.clock(counters)
+        uv = newton.newtonsMethod2DTolerance(phi, uvGuess, geomPoint, uvIntervals, tolerance, counters=counters)
+        instrumentation.addTime(counters, instrumentation.NEWTON, start)
+
+        return uv
@@ -41,6 +41,22 @@ class Spline2D(Geometry, Field):
             
         return result
     
+    def evaluateMany(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        result = np.empty((len(x), self.coeffElems))
+
+        # bispeu evaluates pointwise, where bisplev evaluates on the grid x by y
+        for i, (uKnots, vKnots, coeffs, uDegree, vDegree) in enumerate(self.tcks):
+            values, error = interpolate.dfitpack.bispeu(uKnots, vKnots, coeffs, uDegree, vDegree, x, y)
+
+            if error != 0:
+                raise ValueError("bispeu failed with error code {}".format(error))
+
+            result[:, i] = values
+
+        return result
+    
     def evaluatePartialDerivativeU(self, x, y):
         result = np.empty(self.coeffElems)
         
@@ -37,19 +37,35 @@ class Summary:
         print "mean   = {}".format(self.mean)
         print "var    = {}".format(self.var)
 
-def createSummaries(fileHandler, dataset):
+        renderTime = getattr(self.renderData, 'renderTime', None)
+
+        if renderTime is not None:
+            print "time   = {:.3f}s".format(renderTime)
+
+        counters = getattr(self.renderData.renderResult, 'counters', None)
+
+        if counters is not None:
+            counters.printData()
+
+def createSummaries(resultStore, pool=None, modelTypes=None, texSizes=None):
     result = []
 
     for i in range(ModelType._COUNT):
         result.append([])
 
-    files = fileHandler.findAll()
-    refObj = fileHandler.load(files[0])
+    refIndex = resultStore.find([ModelType.REFERENCE])[0]
+    refObj = resultStore.load(refIndex)
+
+    objs = []
+
+    for i in resultStore.find(modelTypes, texSizes):
+        if i != refIndex:
+            objs.append(resultStore.load(i))
 
-    for i in range(1, len(files)):
-        obj = fileHandler.load(files[i])
+    colors = [obj.renderResult.colors for obj in objs]
+    colorDiffsList = colordiff.compareMany(refObj.renderResult.colors, colors, pool)
 
-        colorDiffs = colordiff.compare(refObj.renderResult.colors, obj.renderResult.colors)
+    for obj, colorDiffs in zip(objs, colorDiffsList):
         summary = Summary(obj, colorDiffs)
         result[obj.modelType].append(summary)
 
@@ -1,7 +1,7 @@
 import sys
 
 import summary
-from fileio.filehandler import FileHandler
+from fileio.resultstore import ResultStore
 from dataset import Dataset
 from modeltype import ModelType
 
@@ -12,12 +12,23 @@ tfNo = int(sys.argv[3])
 
 interestingTexSizes = [8, 16, 32, 64, 128, 256, 512, 1024]
 
+
+def costColumns(renderData):
+    '''Render time and Newton iterations, or dashes for renders without them'''
+    renderTime = renderData.renderTime
+    counters = renderData.renderResult.counters
+
+    timeColumn = '-' if renderTime is None else '{:.2f}'.format(renderTime)
+    newtonColumn = '-' if counters is None else str(counters.newtonIterations)
+
+    return '{} & {}'.format(timeColumn, newtonColumn)
+
+
 dataset = Dataset(rhoNo, phiNo, tfNo)
 
-fileHandler = FileHandler()
-fileHandler.setFiledir('output/results/{},{},{}'.format(rhoNo, phiNo, tfNo))
+resultStore = ResultStore('output/results/{},{},{}'.format(rhoNo, phiNo, tfNo))
 
-summaries = summary.createSummaries(fileHandler, dataset)
+summaries = summary.createSummaries(resultStore)
 
 texoutputdir = 'output/tex'
 
@@ -59,6 +70,8 @@ for i in range(ModelType._COUNT):
         fo.write('{:.2f}'.format(modelSummary.mean))
         fo.write(' & ')
         fo.write('{:.2f}'.format(modelSummary.var))
+        fo.write(' & ')
+        fo.write(costColumns(modelSummary.renderData))
         fo.write(' \\\\\n')
 
     fo.close()
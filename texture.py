@@ -2,6 +2,8 @@ import math
 import numpy as np
 from scipy import interpolate
 
+import bilinear
+
 class Texture2D:
     def __init__(self, textureData):
         cols = len(textureData[0])
@@ -25,6 +27,8 @@ class Texture2D:
         y = np.linspace(marginY, 1.0-marginY, rows)
 
         self.indicator = interpolate.interp2d(x, y, indicators, kind='linear')
+        self.indicatorData = indicators
+        self.indicatorRanges = ([marginX, 1.0-marginX], [marginY, 1.0-marginY])
 
         data = textureData
         data = np.vstack((data[0], data))
@@ -37,6 +41,7 @@ class Texture2D:
         y = np.linspace(-marginY, 1.0+marginY, rows+2)
 
         self.f = interpolate.interp2d(x, y, data, kind='linear')
+        self.dataRanges = ([-marginX, 1.0+marginX], [-marginY, 1.0+marginY])
 
     def fetch(self, uv):
         if self.closest(uv) == -1:
@@ -52,3 +57,20 @@ class Texture2D:
         vIndex = math.floor(uv[1] * self.rows)
 
         return self.textureData[vIndex+1, uIndex+1]
+
+    def fetchMany(self, us, vs):
+        (xRange, yRange) = self.dataRanges
+        scalars = bilinear.interpolate(self.textureData, xRange, yRange, us, vs)
+
+        (xRange, yRange) = self.indicatorRanges
+        nonresident = bilinear.interpolate(self.indicatorData, xRange, yRange, us, vs) > 0.0
+        nonresident |= self.closestMany(us, vs) == -1
+
+        scalars[nonresident] = -1
+
+        return scalars
+
+    def closestMany(self, us, vs):
+        (vIndices, uIndices) = bilinear.closestIndices(us, vs, self.cols, self.rows)
+
+        return self.textureData[vIndices, uIndices]
@@ -2,6 +2,8 @@ import math
 import numpy as np
 from scipy import interpolate
 
+import bilinear
+
 from pattern import CornerPattern, EdgePattern, HorseshoePattern, Location
 
 
@@ -60,6 +62,7 @@ class Texture2D:
         y = np.linspace(-marginY, 1.0+marginY, rows+2)
         
         self.f = interpolate.interp2d(x, y, data, kind='linear', bounds_error=True)
+        self.dataRanges = ([-marginX, 1.0+marginX], [-marginY, 1.0+marginY])
 
     @staticmethod
     def __hasNeighbour(matrix, u, v):
@@ -193,3 +196,19 @@ class Texture2D:
         vIndex = math.floor(uv[1] * self.rows)
         
         return self.textureData[vIndex+1, uIndex+1]
+
+    def fetchMany(self, us, vs):
+        (xRange, yRange) = self.dataRanges
+        scalars = bilinear.interpolate(self.textureData, xRange, yRange, us, vs)
+
+        (vIndices, uIndices) = bilinear.closestIndices(us, vs, self.cols, self.rows)
+        nonresident = self.textureData[vIndices, uIndices] == -1
+
+        # Unpadded indicator indices, clamped to the last texel
+        uIndices = np.minimum(uIndices - 1, self.cols - 1)
+        vIndices = np.minimum(vIndices - 1, self.rows - 1)
+        nonresident |= self.indicators[vIndices, uIndices] < 0.0
+
+        scalars[nonresident] = -1
+
+        return scalars
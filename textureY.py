@@ -2,7 +2,11 @@ import math
 import numpy as np
 from scipy import interpolate
 
-from ray import Ray2D
+import bilinear
+import voxelizer
+
+from inversegrid import InverseGrid
+from orthoray import OrthoRayBundle
 
 
 class Texture2D:
@@ -24,6 +28,7 @@ class Texture2D:
 
         self.f = interpolate.interp2d(x, y, texels, kind='linear', bounds_error=True)
         self.i = interpolate.interp2d(x, y, indicators, kind='linear', bounds_error=True)
+        self.dataRanges = ([-marginX, 1.0+marginX], [-marginY, 1.0+marginY])
 
     def fetch(self, uv):
         if self.i(uv[0], uv[1])[0] < 0.0:
@@ -31,6 +36,15 @@ class Texture2D:
 
         return self.f(uv[0], uv[1])[0]
 
+    def fetchMany(self, us, vs):
+        (xRange, yRange) = self.dataRanges
+        scalars = bilinear.interpolate(self.texels, xRange, yRange, us, vs)
+        nonresident = bilinear.interpolate(self.indicators, xRange, yRange, us, vs) < 0.0
+
+        scalars[nonresident] = -1
+
+        return scalars
+
     def closest(self, uv):
         uIndex = math.floor(uv[0] * self.cols)
         vIndex = math.floor(uv[1] * self.rows)
@@ -38,7 +52,8 @@ class Texture2D:
         return self.texels[vIndex+1, uIndex+1]
 
 
-def create(splineModel, width, height, tolerance, paramPlotter=None, geomPlotter=None):
+def create(splineModel, width, height, tolerance, paramPlotter=None, geomPlotter=None, warmStart=None, pool=None,
+           counters=None):
     # bounding box
     # get screen (pixels based on texture size, width based on bounding box)
     # get view-rays from screen (orthogonal projection)
@@ -46,6 +61,7 @@ def create(splineModel, width, height, tolerance, paramPlotter=None, geomPlotter
     # for each point in the texture (resident and non-resident), get rays/intersections in all 4 directions (intersections may be None)
     # find neighbour pattern for current non-resident texture
     # extrapolate based on neighbour pattern and intersections
+    # warmStart, pool and counters as for SplineModel.generateScalarMatrix
 
     phiPlane = splineModel.phiPlane
     rho = splineModel.rho
@@ -70,44 +86,22 @@ def create(splineModel, width, height, tolerance, paramPlotter=None, geomPlotter
 
     geomPoints = []
     paramPoints = []
+    gridParamPoints = [[None] * samplingsPerRay for i in range(rayCount)]
 
-    horizontalSamplingRays = []
-    horizontalIntersections = []
-
-    verticalSamplingRays = []
-    verticalIntersections = []
-
-    fwdDiagSamplingRays = []
-    fwdDiagIntersections = []
-
-    for y in yValues:
-        samplingRay = Ray2D(np.array([bb.left-xDelta/2, y]), np.array([bb.left, y]), 10, 0)
-        horizontalSamplingRays.append(samplingRay)
-
-        horizontalIntersections.append(phiPlane.findTwoIntersections(samplingRay))
-
-    for x in xValues:
-        samplingRay = Ray2D(np.array([x, bb.bottom-yDelta/2]), np.array([x, bb.bottom]), 10, 0)
-        verticalSamplingRays.append(samplingRay)
+    horizontalPixels = np.column_stack((np.ones(rayCount) * bb.left, yValues))
+    horizontalSamplingRays = OrthoRayBundle(horizontalPixels, np.array([1.0, 0.0]), xDelta/2)
+    horizontalIntersections = horizontalSamplingRays.findIntersections(phiPlane)
 
-        verticalIntersections.append(phiPlane.findTwoIntersections(samplingRay))
+    verticalPixels = np.column_stack((xValues, np.ones(samplingsPerRay) * bb.bottom))
+    verticalSamplingRays = OrthoRayBundle(verticalPixels, np.array([0.0, 1.0]), yDelta/2)
+    verticalIntersections = verticalSamplingRays.findIntersections(phiPlane)
 
-    for i in reversed(range(height - 1)):
-        eye = np.array([bb.left - xDelta/2, bb.bottom - yDelta/2 + i*yDelta])
-        pixel = np.array([bb.left, bb.bottom + i*yDelta])
-        samplingRay = Ray2D(eye, pixel, 10, 0)
-        fwdDiagSamplingRays.append(samplingRay)
-
-        fwdDiagIntersections.append(phiPlane.findTwoIntersections(samplingRay))
-
-
-    for i in range(width):
-        eye = np.array([bb.left - xDelta/2 + i*xDelta, bb.bottom - yDelta/2])
-        pixel = np.array([bb.left + i*xDelta, bb.bottom])
-        samplingRay = Ray2D(eye, pixel, 10, 0)
-        fwdDiagSamplingRays.append(samplingRay)
-
-        fwdDiagIntersections.append(phiPlane.findTwoIntersections(samplingRay))
+    # Rays starting up the left side, then along the bottom
+    fwdDiagPixels = [[bb.left, bb.bottom + i*yDelta] for i in reversed(range(height - 1))]
+    fwdDiagPixels += [[bb.left + i*xDelta, bb.bottom] for i in range(width)]
+    fwdDiagDir = np.array([xDelta/2, yDelta/2])
+    fwdDiagSamplingRays = OrthoRayBundle(fwdDiagPixels, fwdDiagDir, np.linalg.norm(fwdDiagDir))
+    fwdDiagIntersections = fwdDiagSamplingRays.findIntersections(phiPlane)
 
     for inter in fwdDiagIntersections:
         if inter is not None:
@@ -115,6 +109,9 @@ def create(splineModel, width, height, tolerance, paramPlotter=None, geomPlotter
             pass
 
 
+    rows = []
+    scanlines = []
+
     for i, y in enumerate(yValues):
         intersections = horizontalIntersections[i]
 
@@ -124,26 +121,35 @@ def create(splineModel, width, height, tolerance, paramPlotter=None, geomPlotter
         inGeomPoint = intersections[0].geomPoint
         outGeomPoint = intersections[1].geomPoint
 
-        prevUV = intersections[0].paramPoint
+        rows.append(i)
+        scanlines.append((y, (xValues >= inGeomPoint[0]) & (xValues <= outGeomPoint[0]),
+                          intersections[0].paramPoint))
 
-        for j, x in enumerate(xValues):
-            if x < inGeomPoint[0] or x > outGeomPoint[0]:
-                continue
+    voxelized = voxelizer.voxelizeScanlines(phiPlane, xValues, scanlines, tolerance, warmStart, pool,
+                                            counters=counters)
 
-            samplePoint = np.array([x, y])
+    residentRows = []
+    residentCols = []
 
-            pApprox = phiPlane.inverseWithinTolerance(samplePoint, prevUV, tolerance)
-            gApprox = phiPlane.evaluate(pApprox[0], pApprox[1])
-            geomPoints.append(gApprox)
+    for i, (rowParamPoints, rowGeomPoints) in zip(rows, voxelized):
+        for j, pApprox in enumerate(rowParamPoints):
+            if pApprox is None:
+                continue
 
+            geomPoints.append(rowGeomPoints[j])
             paramPoints.append(pApprox)
+            gridParamPoints[i][j] = pApprox
+
+            residentRows.append(i+1)
+            residentCols.append(j+1)
 
-            scalar = rho.evaluate(pApprox[0], pApprox[1])
-            samplingScalars[i+1][j+1] = scalar
-            indicators[i+1][j+1] = 1
-            indicators2[i+1][j+1] = 1
+    if len(paramPoints) > 0:
+        paramArray = np.asarray(paramPoints)
+        samplingScalars[residentRows, residentCols] = rho.evaluateMany(paramArray[:, 0], paramArray[:, 1])[:, 0]
+        indicators[residentRows, residentCols] = 1
+        indicators2[residentRows, residentCols] = 1
 
-            prevUV = pApprox
+    splineModel.voxelizationGrid = InverseGrid(bb, gridParamPoints) if len(paramPoints) > 0 else None
 
     # Extrapolation
     for i, intersections in enumerate(horizontalIntersections):
@@ -1,8 +1,10 @@
 import math
 import numpy as np
 
+import voxelizer
+
+from orthoray import OrthoRayBundle
 from pattern import Location
-from ray import Ray2D
 from screen import Screen
 
 
@@ -13,16 +15,62 @@ def normalize(v):
     vmag = magnitude(v)
     return np.array([ v[i]/vmag  for i in range(len(v)) ])
 
-def match(array, pattern):
+def matchMany(neighbours, pattern):
+    '''
+    Which cells match pattern, a string of 'Y' (resident), 'N' (not) or '-'
+    (either) per Location, neighbours being indexed by Location first
+    '''
+    result = np.ones(neighbours.shape[1:], dtype=bool)
+
     for i, c in enumerate(pattern):
         if c == 'Y':
-            if not array[i]:
-                return False
+            result &= neighbours[i]
         elif c == 'N':
-            if array[i]:
-                return False
+            result &= ~neighbours[i]
+
+    return result
+
+def neighbourMasks(resident):
+    '''
+    For each cell, whether each of its neighbours is resident, indexed by
+    Location first. Neighbours outside the array are not
+    '''
+    (rows, cols) = resident.shape
+    padded = np.zeros((rows + 2, cols + 2), dtype=bool)
+    padded[1:-1, 1:-1] = resident
+
+    offsets = {Location.TOPLEFT : (1, -1), Location.TOP : (1, 0), Location.TOPRIGHT : (1, 1),
+               Location.RIGHT : (0, 1), Location.BOTTOMRIGHT : (-1, 1), Location.BOTTOM : (-1, 0),
+               Location.BOTTOMLEFT : (-1, -1), Location.LEFT : (0, -1)}
+
+    result = np.empty((8, rows, cols), dtype=bool)
+
+    for location, (dj, di) in offsets.items():
+        result[location] = padded[1+dj:rows+1+dj, 1+di:cols+1+di]
+
+    return result
 
-    return True
+def intersectionArrays(intersectionsList, which, rho):
+    '''
+    Geometric points and rho at intersection which (0 = in, 1 = out) of each
+    ray, as arrays, along with which rays hit at all
+    '''
+    count = len(intersectionsList)
+    hits = np.array([intersections is not None for intersections in intersectionsList], dtype=bool)
+    geomPoints = np.zeros((count, 2))
+    paramPoints = np.zeros((count, 2))
+    scalars = np.zeros(count)
+
+    for k in np.flatnonzero(hits):
+        intersection = intersectionsList[k][which]
+
+        geomPoints[k] = intersection.geomPoint
+        paramPoints[k] = intersection.paramPoint
+
+    if hits.any():
+        scalars[hits] = rho.evaluateMany(paramPoints[hits, 0], paramPoints[hits, 1])[:, 0]
+
+    return hits, geomPoints, scalars
 
 
 class Direction:
@@ -90,42 +138,38 @@ class TextureGenerator:
         return screen
 
     def createSamplingRays(self, screen):
-        rays = []
-
-        for pixel in screen.pixels:
-            eye = pixel - screen.viewDir
-            samplingRay = Ray2D(eye, pixel, 10, 0)
-            rays.append(samplingRay)
-
-        return rays
+        return OrthoRayBundle(screen.pixels, screen.viewDir, 1.0)
 
     def findIntersections(self, ray):
         phiPlane = self.splineModel.phiPlane
         return phiPlane.findTwoIntersections(ray)
 
-    def generate(self, boundingBox):
+    def generate(self, boundingBox, pool=None):
+        '''
+        Given a pool, the scanlines are voxelized over it, see voxelizer.
+        The sampling rays of each direction are intersected once, and the
+        non-resident cells next to resident ones extrapolated all at once
+        '''
         h = self.height
         w = self.width
         phiPlane = self.splineModel.phiPlane
         rho = self.splineModel.rho
 
-        screenSamplingRays = []
-
-        for direction in Direction.directions:
-            screen = self.createScreen(direction)
-            screenSamplingRays.append(self.createSamplingRays(screen))
-
         samplingScalars = np.ones((h + 2, w + 2)) * -1
         indicators = np.ones((h + 2, w + 2)) * -1
 
         paramPoints = []
         geomPoints = []
 
-        #vScreen = self.createScreen(Direction.VERTICAL)
+        # Rays along +x through the rows, along +y through the columns from
+        # the right, and along the positive diagonal
         hSamplingRays = self.createSamplingRays(self.createScreen(Direction.VERTICAL))
         vSamplingRays = self.createSamplingRays(self.createScreen(Direction.HORIZONTAL))
         ndSamplingRays = self.createSamplingRays(self.createScreen(Direction.NEGATIVE_DIAGONAL))
-        pdSamplingRays = self.createSamplingRays(self.createScreen(Direction.POSITIVE_DIAGONAL))
+
+        hIntersections = hSamplingRays.findIntersections(phiPlane)
+        vIntersections = vSamplingRays.findIntersections(phiPlane)
+        ndIntersections = ndSamplingRays.findIntersections(phiPlane)
 
         # NB: ONLY FOR HORIZONTAL
         rayCount = self.height
@@ -137,17 +181,11 @@ class TextureGenerator:
         xValues = np.linspace(bb.left+xDelta/2, bb.right-xDelta/2, samplingsPerRay)
         yValues = np.linspace(bb.bottom+yDelta/2, bb.top-yDelta/2, rayCount)
 
-        horizontalSamplingRays = []
-        horizontalIntersections = []
-        for y in yValues:
-            samplingRay = Ray2D(np.array([bb.left-xDelta/2, y]), np.array([bb.left, y]), 10, 0)
-            horizontalSamplingRays.append(samplingRay)
-
-            horizontalIntersections.append(phiPlane.findTwoIntersections(samplingRay))
+        rows = []
+        scanlines = []
 
         for v, y in enumerate(yValues):
-            intersections = self.findIntersections(hSamplingRays[v])
-            #intersections = horizontalIntersections[v]
+            intersections = hIntersections[v]
 
             if intersections is None:
                 continue
@@ -155,15 +193,18 @@ class TextureGenerator:
             inGeomPoint = intersections[0].geomPoint
             outGeomPoint = intersections[1].geomPoint
 
-            prevUV = intersections[0].paramPoint
+            rows.append(v)
+            scanlines.append((y, (xValues >= inGeomPoint[0]) & (xValues <= outGeomPoint[0]),
+                              intersections[0].paramPoint))
 
-            for u, x in enumerate(xValues):
-                if x < inGeomPoint[0] or x > outGeomPoint[0]:
-                    continue
+        voxelized = voxelizer.voxelizeScanlines(phiPlane, xValues, scanlines, 1e-5, pool=pool) # TODO: not hardcoded
 
-                samplePoint = np.array([x, y])
+        residentRows = []
+        residentCols = []
 
-                pApprox = phiPlane.inverseWithinTolerance(samplePoint, prevUV, 1e-5) # TODO: not hardcoded
+        for v, (y, inside, prevUV), (rowParamPoints, rowGeomPoints) in zip(rows, scanlines, voxelized):
+            for u in np.flatnonzero(inside):
+                pApprox = rowParamPoints[u]
 
                 if pApprox is None:
                     pApprox = prevUV
@@ -172,147 +213,61 @@ class TextureGenerator:
                 paramPoints.append(pApprox)
                 geomPoints.append(gApprox)
 
-                scalar = rho.evaluate(pApprox[0], pApprox[1])
-                samplingScalars[v+1][u+1] = scalar
-                indicators[v+1][u+1] = 1
+                residentRows.append(v+1)
+                residentCols.append(u+1)
 
                 prevUV = pApprox
 
-        origIndicators = np.copy(indicators)
-
-        # Vertical: u -> samplingRays[-1 - u]
-        # Horizontal: v -> samplingRays[v]
-        # Neg.diag: u,v -> samplingRays[w-1-u+v]
-        # Pos.diag: u,v -> samplingRays[u+v]
-
-        # Extrapolation
-        for j in range(h+1):
-            if j < h+1:
-                hIntersections = self.findIntersections(horizontalSamplingRays[j-1])
-            else:
-                hIntersections = None
-
-            for i in range(w+1):
-                #pdSamplingRay = pdSamplingRays[i-1 + j-1]
-
-                neighbors = self.getNeighbours(origIndicators, i, j)
-
-                if i != 0:
-                    vIntersections = self.findIntersections(vSamplingRays[w-1-i])
-                else:
-                    vIntersections = None
-
-                index = w-1-(i-1)+j-1
-
-                if index < 0 or index > len(ndSamplingRays) - 1:
-                    ndIntersections = None
-                else:
-                    ndSamplingRay = ndSamplingRays[w-1-(i-1)+j-1]
-                    ndIntersections = self.findIntersections(ndSamplingRay)
-
-                if origIndicators[j][i] == -1:
-                    if ndIntersections is not None and (match(neighbors, '-NYN----') or match(neighbors, '-YYY----')):
-                        vGeomPoint = np.array([xValues[i], yValues[j]])
-
-                        delta = magnitude(np.array([xDelta, yDelta]))
-
-                        self.extrapolate(ndIntersections[0], delta, vGeomPoint, rho, samplingScalars, indicators, [j,i], Location.TOPRIGHT)
-
-                    elif ndIntersections is not None and (match(neighbors, '-----NYN') or match(neighbors, '-----YYY')):
-                        print "i={}, j={}".format(i,j)
-                        vGeomPoint = np.array([xValues[i], yValues[j]])
-
-                        delta = magnitude(np.array([xDelta, yDelta]))
-
-                        self.extrapolate(ndIntersections[1], delta, vGeomPoint, rho, samplingScalars, indicators, [j,i], Location.BOTTOMLEFT)
-
-
-                    elif i < len(xValues) and j < len(yValues) and match(neighbors, '---Y----'):
-                        vGeomPoint = np.array([xValues[i], yValues[j]])
-
-                        iParamPoint = hIntersections[0].paramPoint
-                        iGeomPoint = hIntersections[0].geomPoint
-
-                        ex = (xValues[i] - iGeomPoint[0]) / xDelta
-
-                        #print "A={}, B={}".format(iGeomPoint[1], yValues[j])
-                        #iv = vGeomPoint - iGeomPoint
-                        #ex = magnitude(iv) / xDelta
-
-                        ey = rho.evaluate(iParamPoint[0], iParamPoint[1])
-
-                        ey0 = samplingScalars[j][i+1]
-
-                        ey1 = ey0 + float(ey - ey0)/ex
-                        samplingScalars[j][i] = ey1
-
-                        indicators[j][i] = 1.0 - 1.0/ex
-
-
-                        #self.extrapolate(hIntersections[0], xDelta, vGeomPoint, rho, samplingScalars, indicators, [j,i], Location.RIGHT)
-
-
-                    elif vIntersections is not None and match(neighbors, '-Y------'):
-                        vGeomPoint = np.array([xValues[i], yValues[j]])
-
-                        self.extrapolate(vIntersections[0], yDelta, vGeomPoint, rho, samplingScalars, indicators, [j,i], Location.TOP)
-
+        if len(paramPoints) > 0:
+            paramArray = np.asarray(paramPoints)
+            samplingScalars[residentRows, residentCols] = rho.evaluateMany(paramArray[:, 0], paramArray[:, 1])[:, 0]
+            indicators[residentRows, residentCols] = 1
+
+        # Cell (j, i) of the ghost cell padded matrices, centred at
+        # (xCentres[i], yCentres[j]), lies on
+        # Horizontal: hSamplingRays[j-1]
+        # Vertical: vSamplingRays[w-i]
+        # Neg.diag: ndSamplingRays[w-1-i+j]
+        xCentres = np.concatenate(([xValues[0] - xDelta], xValues, [xValues[-1] + xDelta]))
+        yCentres = np.concatenate(([yValues[0] - yDelta], yValues, [yValues[-1] + yDelta]))
+
+        (jj, ii) = np.indices(indicators.shape)
+
+        resident = indicators >= 0
+        neighbours = neighbourMasks(resident)
+        remaining = ~resident
+
+        diagDelta = magnitude(np.array([xDelta, yDelta]))
+
+        # In order of precedence: the neighbour patterns, the resident
+        # neighbour to extrapolate from, the ray index of each cell, the
+        # intersections along those rays and the sample spacing along them
+        extrapolations = [
+            (matchMany(neighbours, '-NYN----') | matchMany(neighbours, '-YYY----'), (1, 1),
+             w-1-ii+jj, intersectionArrays(ndIntersections, 0, rho), diagDelta),
+            (matchMany(neighbours, '-----NYN') | matchMany(neighbours, '-----YYY'), (-1, -1),
+             w-1-ii+jj, intersectionArrays(ndIntersections, 1, rho), diagDelta),
+            (matchMany(neighbours, '---Y----'), (0, 1),
+             jj-1, intersectionArrays(hIntersections, 0, rho), xDelta),
+            (matchMany(neighbours, '-Y------'), (1, 0),
+             w-ii, intersectionArrays(vIntersections, 0, rho), yDelta)
+        ]
+
+        for patternCells, (dj, di), rayIndices, (hits, iGeomPoints, iScalars), delta in extrapolations:
+            valid = (rayIndices >= 0) & (rayIndices < len(hits))
+            valid[valid] = hits[rayIndices[valid]]
+
+            cells = remaining & patternCells & valid
+            remaining &= ~cells
+
+            (j, i) = np.nonzero(cells)
+            k = rayIndices[j, i]
+
+            vGeomPoints = np.column_stack((xCentres[i + di], yCentres[j + dj]))
+            ivNorms = np.sqrt(((vGeomPoints - iGeomPoints[k])**2).sum(axis=1)) / delta
+
+            sV = samplingScalars[j + dj, i + di]
+            samplingScalars[j, i] = sV + (iScalars[k] - sV) / ivNorms
+            indicators[j, i] = 1.0 - 1.0/ivNorms
 
         return samplingScalars, indicators
-
-    @staticmethod
-    def extrapolate(intersection, delta, vGeomPoint, rho, samplingScalars, indicators, jiE, location):
-        iParamPoint = intersection.paramPoint
-        iGeomPoint = intersection.geomPoint
-
-        iv = vGeomPoint - iGeomPoint
-        ivNorm = magnitude(iv) / delta
-
-        if location == Location.TOP:
-            jV = jiE[0] + 1
-            iV = jiE[1]
-        elif location == Location.TOPRIGHT:
-            jV = jiE[0] + 1
-            iV = jiE[1] + 1
-        elif location == Location.RIGHT:
-            jV = jiE[0]
-            iV = jiE[1] + 1
-        else:
-            jV = None
-            iV = None
-
-        s_i = rho.evaluate(iParamPoint[0], iParamPoint[1])
-        s_v = samplingScalars[jV][iV]
-
-        s_e = s_v + (s_i - s_v) / ivNorm
-        samplingScalars[jiE[0]][jiE[1]] = s_e
-
-        indicators[jiE[0]][jiE[1]] = 1.0 - 1.0/ivNorm
-
-    @staticmethod
-    def getNeighbours(indicators, i, j):
-        (rows, cols) = indicators.shape
-        result = np.zeros(8, dtype=bool)
-
-        if j > 0:
-            result[Location.BOTTOM] = indicators[j-1][i] >= 0
-
-            if i > 0:
-                result[Location.BOTTOMLEFT] = indicators[j-1][i-1] >= 0
-            if i < cols-1:
-                result[Location.BOTTOMRIGHT] = indicators[j-1][i+1] >= 0
-
-        if j < rows-1:
-            result[Location.TOP] = indicators[j+1][i] >= 0
-
-            if i > 0:
-                result[Location.TOPLEFT] = indicators[j+1][i-1] >= 0
-            if i < cols-1:
-                result[Location.TOPRIGHT] = indicators[j+1][i+1] >= 0
-
-        if i > 0:
-            result[Location.LEFT] = indicators[j][i-1] >= 0
-        if i < cols-1:
-            result[Location.RIGHT] = indicators[j][i+1] >= 0
-
-        return result
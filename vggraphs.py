@@ -4,7 +4,7 @@ import numpy as np
 import sys
 
 import summary
-from fileio.filehandler import FileHandler
+from fileio.resultstore import ResultStore
 from plotting.graphplotter import GraphPlotter
 from dataset import Dataset
 from modeltype import ModelType
@@ -39,10 +39,9 @@ legendFig = plt.figure(figsize=[6, 6])
 
 dataset = Dataset(rhoNo, phiNo, tfNo)
 
-fileHandler = FileHandler()
-fileHandler.setFiledir('output/results/{},{},{}'.format(rhoNo, phiNo, tfNo))
+resultStore = ResultStore('output/results/{},{},{}'.format(rhoNo, phiNo, tfNo))
 
-summaries = summary.createSummaries(fileHandler, dataset)
+summaries = summary.createSummaries(resultStore)
 
 texDimSizes = []
 viewRayDeltas = np.array([0.128, 0.064, 0.032, 0.016, 0.008, 0.004, 0.002, 0.001])
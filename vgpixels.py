@@ -46,7 +46,7 @@ eye = np.array([-1.2, 0.65])
 pixelX = -0.5
 screenTop = 0.9
 screenBottom = 0.2
-screen = Screen(pixelX, screenTop, screenBottom, numPixels)
+screen = Screen(np.array([pixelX, screenBottom]), np.array([pixelX, screenTop]), numPixels)
 
 refIntersectTolerance = 1e-5
 refTolerance = 1e-5
@@ -63,8 +63,9 @@ refSplineModel = SplineModel(tf, refPhiPlane, rho, refTolerance)
 directSplineModel = SplineModel(tf, refPhiPlane, rho)
 voxelModel = None
 
-voxelWidth = boundingBox.getHeight() / float(texDimSize)
-criterion = GeometricCriterion(screen.pixelWidth, voxelWidth)
+voxelWidth = boundingBox.getWidth() / float(texDimSize)
+voxelHeight = boundingBox.getHeight() / float(texDimSize)
+criterion = GeometricCriterion(screen.pixelWidth, voxelWidth, voxelHeight)
 
 if modelChoice != 0:
     samplingScalars = refSplineModel.generateScalarMatrix(boundingBox, texDimSize, texDimSize, voxTolerance)
@@ -100,10 +101,12 @@ ratios = None
 
 if modelChoice == 3 or modelChoice == 4:
     renderer = HybridRenderer(eye, screen)
+    renderer.recordCosts = True
     renderResult = renderer.render(model, viewRayDelta)
     ratios = renderResult.ratios
 else:
     renderer = Renderer(eye, screen)
+    renderer.recordCosts = True
     renderResult = renderer.render(model, viewRayDelta)
 
 colors = renderResult.colors
@@ -141,3 +144,20 @@ if modelChoice == 3 or modelChoice == 4:
 
     plt.figure(figratio.number)
     plt.savefig("output/vg/pixels{}Ratio.pdf".format(name), format="pdf", transparent=True)
+
+costs = renderResult.costs
+costMaps = [('Samples', costs.samples), ('Newton', costs.newtonIterations), ('Time', costs.times)]
+
+for costName, costValues in costMaps:
+    figcost = plt.figure(figsize=figsize)
+    gscost = GridSpec(1, 1)
+    axcost = figcost.add_subplot(gscost[0, 0])
+
+    pcost = PixelPlotter(axcost)
+    pcost.plotHeatMap(costValues)
+    axcost.set_aspect(aspectRatio)
+
+    figcost.tight_layout()
+
+    plt.figure(figcost.number)
+    plt.savefig("output/vg/pixels{}{}.pdf".format(name, costName), format="pdf", transparent=True)
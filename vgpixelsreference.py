@@ -29,7 +29,7 @@ eye = np.array([-1.2, 0.65])
 pixelX = -0.5
 screenTop = 0.9
 screenBottom = 0.2
-screen = Screen(pixelX, screenTop, screenBottom, numPixels)
+screen = Screen(np.array([pixelX, screenBottom]), np.array([pixelX, screenTop]), numPixels)
 
 refIntersectTolerance = 1e-5
 refTolerance = 1e-5
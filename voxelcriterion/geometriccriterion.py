@@ -1,7 +1,6 @@
 import math
 import numpy as np
 
-import vecutil
 from voxelcriterion import VoxelCriterion
 
 class GeometricCriterion(VoxelCriterion):
@@ -12,17 +11,32 @@ class GeometricCriterion(VoxelCriterion):
     def lodLevel(self, viewRay, samplePoint):
         farZ = samplePoint[0] - viewRay.eye[0]
 
-        upperFrustumDir = vecutil.normalize(viewRay.pixelTop - viewRay.eye)
-        t = farZ / upperFrustumDir[0]
-        upperEpsilonPoint = np.array([samplePoint[0], viewRay.eye[1] + t*upperFrustumDir[1]])
-
-        lowerFrustumDir = vecutil.normalize(viewRay.pixelBottom - viewRay.eye)
-        t = farZ / lowerFrustumDir[0]
-        lowerEpsilonPoint = np.array([samplePoint[0], viewRay.eye[1] + t*lowerFrustumDir[1]])
-
-        epsilon = upperEpsilonPoint[1] - lowerEpsilonPoint[1]
-
-        if 0.5 * epsilon > self.voxelDiagonal:
+        if farZ > self.switchDistance(viewRay):
             return 0
         else:
             return -1
+
+    def switchDistance(self, viewRay):
+        upperFrustumDir = viewRay.frustumUpperDir
+        lowerFrustumDir = viewRay.frustumLowerDir
+
+        # The frustum width epsilon grows linearly with the depth farZ
+        epsilonPerDepth = upperFrustumDir[1]/upperFrustumDir[0] - lowerFrustumDir[1]/lowerFrustumDir[0]
+
+        if epsilonPerDepth <= 0:
+            return float('inf')
+
+        # 0.5 * epsilon > voxelDiagonal
+        return 2.0 * self.voxelDiagonal / epsilonPerDepth
+
+    def switchDistances(self, rayBatch):
+        upperDirs = rayBatch.frustumUpperDirs
+        lowerDirs = rayBatch.frustumLowerDirs
+
+        epsilonPerDepth = upperDirs[:, 1]/upperDirs[:, 0] - lowerDirs[:, 1]/lowerDirs[:, 0]
+        distances = np.ones(len(epsilonPerDepth)) * float('inf')
+
+        widening = epsilonPerDepth > 0
+        distances[widening] = 2.0 * self.voxelDiagonal / epsilonPerDepth[widening]
+
+        return distances
@@ -1,5 +1,13 @@
+import numpy as np
+
 from voxelcriterion import VoxelCriterion
 
 class OnlySplineCriterion(VoxelCriterion):
     def lodLevel(self, viewRay, samplePoint):
         return -1
+
+    def switchDistance(self, viewRay):
+        return float('inf')
+
+    def switchDistances(self, rays):
+        return np.ones(len(rays)) * float('inf')
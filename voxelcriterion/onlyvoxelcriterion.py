@@ -1,5 +1,13 @@
+import numpy as np
+
 from voxelcriterion import VoxelCriterion
 
 class OnlyVoxelCriterion(VoxelCriterion):
     def lodLevel(self, viewRay, samplePoint):
         return 0
+
+    def switchDistance(self, viewRay):
+        return float('-inf')
+
+    def switchDistances(self, rays):
+        return np.ones(len(rays)) * float('-inf')
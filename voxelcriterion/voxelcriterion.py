@@ -1,4 +1,5 @@
 import abc
+import numpy as np
 
 class VoxelCriterion:
     __metaclass__ = abc.ABCMeta
@@ -6,3 +7,14 @@ class VoxelCriterion:
     @abc.abstractmethod
     def lodLevel(self, viewRay, samplePoint):
         return
+
+    @abc.abstractmethod
+    def switchDistance(self, viewRay):
+        '''
+        Depth (x-distance from the eye) beyond which the voxel model is used
+        '''
+        return
+
+    def switchDistances(self, rays):
+        '''switchDistance for each ray of a RayBatch or list of rays'''
+        return np.array([self.switchDistance(ray) for ray in rays], dtype=float)
@@ -0,0 +1,75 @@
+import numpy as np
+
+import newton
+
+
+def voxelizeScanline(phiPlane, xValues, y, inside, startUV, tolerance, warmStart=None, counters=None):
+    '''
+    Inverts the texel centres (x, y) of a horizontal scanline where inside is
+    set, each from the previous texel's (u, v), starting at startUV, or from
+    warmStart (an InverseGrid) if it has a seed there. Returns lists of param
+    and geom points, None where outside or where Newton fails
+    '''
+    rowParamPoints = [None] * len(xValues)
+    rowGeomPoints = [None] * len(xValues)
+    prevUV = startUV
+
+    for j in np.flatnonzero(inside):
+        samplePoint = np.array([xValues[j], y])
+        pGuess = prevUV
+
+        if warmStart is not None:
+            seed = warmStart.seed(samplePoint)
+
+            if seed is not None:
+                pGuess = seed
+
+        pApprox = phiPlane.inverseWithinTolerance(samplePoint, pGuess, tolerance, counters)
+
+        if pApprox is None:
+            continue
+
+        rowParamPoints[j] = pApprox
+        rowGeomPoints[j] = phiPlane.evaluate(pApprox[0], pApprox[1])
+
+        prevUV = pApprox
+
+    return rowParamPoints, rowGeomPoints
+
+def voxelizeBlock(args):
+    '''Returns the voxelized scanlines and the newton.Counters of the block'''
+    (phiPlane, xValues, scanlines, tolerance, warmStart) = args
+    counters = newton.Counters()
+
+    rows = [voxelizeScanline(phiPlane, xValues, y, inside, startUV, tolerance, warmStart, counters)
+            for (y, inside, startUV) in scanlines]
+
+    return rows, counters
+
+def voxelizeScanlines(phiPlane, xValues, scanlines, tolerance, warmStart=None, pool=None, blockSize=8,
+                      counters=None):
+    '''
+    Voxelizes scanlines, a list of (y, inside, startUV) as for
+    voxelizeScanline, returning a list of (rowParamPoints, rowGeomPoints).
+    Scanlines only chain (u, v) within themselves, so given a pool (e.g. a
+    multiprocessing.Pool) they are distributed over it in blocks of
+    blockSize, with the same result as serially. Each block counts its own
+    Newton iterations, which are added to counters, if given
+    '''
+    blocks = [(phiPlane, xValues, scanlines[i:i+blockSize], tolerance, warmStart)
+              for i in range(0, len(scanlines), blockSize)]
+
+    if pool is None:
+        results = map(voxelizeBlock, blocks)
+    else:
+        results = pool.map(voxelizeBlock, blocks)
+
+    rows = []
+
+    for blockRows, blockCounters in results:
+        rows.extend(blockRows)
+
+        if counters is not None:
+            counters.add(blockCounters)
+
+    return rows